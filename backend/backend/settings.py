@@ -39,6 +39,129 @@ INSTALLED_APPS = [
 
 # FINNHUB Data API Configuration
 FINNHUB_API_KEY = config('FINNHUB_API_KEY')
+FINNHUB_BASE_URL = config('FINNHUB_BASE_URL', default='https://finnhub.io/api/v1')
+FINNHUB_WS_URL = config('FINNHUB_WS_URL', default='wss://ws.finnhub.io')
+FINNHUB_CONNECT_TIMEOUT = config('FINNHUB_CONNECT_TIMEOUT', default=3, cast=int)
+FINNHUB_TIMEOUT = config('FINNHUB_TIMEOUT', default=10, cast=int)
+FINNHUB_MAX_WORKERS = config('FINNHUB_MAX_WORKERS', default=8, cast=int)
+
+# Pooled HTTP session shared by every FinnhubService instance
+FINNHUB_POOL_CONNECTIONS = config('FINNHUB_POOL_CONNECTIONS', default=4, cast=int)
+FINNHUB_POOL_MAXSIZE = config('FINNHUB_POOL_MAXSIZE', default=16, cast=int)
+FINNHUB_RETRIES = config('FINNHUB_RETRIES', default=2, cast=int)
+FINNHUB_RETRY_BACKOFF = config('FINNHUB_RETRY_BACKOFF', default=0.5, cast=float)
+
+# Token-bucket rate limit for Finnhub calls (free tier: 60 calls/minute).
+# Set FINNHUB_RATE_LIMIT_SHARED to share the budget across workers through
+# FINNHUB_RATE_LIMIT_CACHE_ALIAS (below, a shared backend).
+FINNHUB_RATE_LIMIT_PER_SECOND = config('FINNHUB_RATE_LIMIT_PER_SECOND', default=1.0, cast=float)
+FINNHUB_RATE_LIMIT_BURST = config('FINNHUB_RATE_LIMIT_BURST', default=10, cast=int)
+FINNHUB_RATE_LIMIT_SHARED = config('FINNHUB_RATE_LIMIT_SHARED', default=False, cast=bool)
+
+# Circuit breaker: open after N consecutive failures, probe again after the timeout
+FINNHUB_BREAKER_FAILURE_THRESHOLD = config('FINNHUB_BREAKER_FAILURE_THRESHOLD', default=5, cast=int)
+FINNHUB_BREAKER_RESET_TIMEOUT = config('FINNHUB_BREAKER_RESET_TIMEOUT', default=30, cast=int)
+
+# Quote cache in front of FinnhubService.get_stock_quote
+FINNHUB_QUOTE_CACHE_ALIAS = 'finnhub_quotes'
+FINNHUB_QUOTE_CACHE_TTL = config('FINNHUB_QUOTE_CACHE_TTL', default=15, cast=int)
+FINNHUB_QUOTE_CACHE_MAX_ENTRIES = config('FINNHUB_QUOTE_CACHE_MAX_ENTRIES', default=5000, cast=int)
+# How long the last good quote is kept as a stale fallback during outages
+FINNHUB_LAST_QUOTE_TTL = config('FINNHUB_LAST_QUOTE_TTL', default=86400, cast=int)
+
+# Portfolio valuation reads Stock.current_price while it is younger than this (seconds)
+PORTFOLIO_MAX_STALENESS = config('PORTFOLIO_MAX_STALENESS', default=120, cast=int)
+
+# Portfolio analytics (stocks.services.analytics)
+ANALYTICS_BENCHMARK_SYMBOL = config('ANALYTICS_BENCHMARK_SYMBOL', default='SPY')
+ANALYTICS_RISK_FREE_RATE = config('ANALYTICS_RISK_FREE_RATE', default=0.0, cast=float)
+ANALYTICS_DEFAULT_DAYS = config('ANALYTICS_DEFAULT_DAYS', default=365, cast=int)
+
+# Report queue (run_report_worker)
+REPORT_WORKER_CONCURRENCY = config('REPORT_WORKER_CONCURRENCY', default=2, cast=int)
+REPORT_WORKER_POLL_INTERVAL = config('REPORT_WORKER_POLL_INTERVAL', default=2.0, cast=float)
+REPORT_MAX_ATTEMPTS = config('REPORT_MAX_ATTEMPTS', default=3, cast=int)
+REPORT_RETRY_BACKOFF = config('REPORT_RETRY_BACKOFF', default=30, cast=int)
+# GENERATING jobs older than this (seconds) are assumed orphaned by a dead worker
+REPORT_JOB_TIMEOUT = config('REPORT_JOB_TIMEOUT', default=900, cast=int)
+# Seconds between sweeps for such jobs while a worker runs
+REPORT_REQUEUE_INTERVAL = config('REPORT_REQUEUE_INTERVAL', default=60, cast=int)
+
+# Auth0 access tokens are verified (RS256) against the tenant JWKS, whose
+# keys are kept for AUTH0_JWKS_LIFESPAN seconds and refetched early when a
+# token names an unknown kid. A verified token then maps to its user id in
+# an in-process cache until it expires or AUTH0_TOKEN_CACHE_TTL passes.
+AUTH0_JWKS_LIFESPAN = config('AUTH0_JWKS_LIFESPAN', default=3600, cast=int)
+AUTH0_TOKEN_CACHE_ALIAS = 'auth0_tokens'
+AUTH0_TOKEN_CACHE_TTL = config('AUTH0_TOKEN_CACHE_TTL', default=300, cast=int)
+AUTH0_TOKEN_CACHE_MAX_ENTRIES = config('AUTH0_TOKEN_CACHE_MAX_ENTRIES', default=10000, cast=int)
+
+# Cache shared by every worker process, for entries that are invalidated
+# on writes (a per-process locmem cache would miss other workers' writes).
+# The database cache works out of the box (its table is created by a
+# migration) for development and small deployments, but every read is a
+# query and every write also counts (and may cull) the table. Production
+# should point SHARED_CACHE_BACKEND/LOCATION at Redis or Memcached
+# (check user_try.W001 warns otherwise).
+SHARED_CACHE_ALIAS = 'shared'
+SHARED_CACHE_BACKEND = config('SHARED_CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache')
+SHARED_CACHE = {
+    'BACKEND': SHARED_CACHE_BACKEND,
+    'LOCATION': config('SHARED_CACHE_LOCATION', default='django_shared_cache'),
+}
+if SHARED_CACHE_BACKEND == 'django.core.cache.backends.db.DatabaseCache':
+    # Django's default of 300 entries would evict users, returns and symbol
+    # interest almost immediately; cull a tenth of the table when full
+    SHARED_CACHE['OPTIONS'] = {
+        'MAX_ENTRIES': config('SHARED_CACHE_MAX_ENTRIES', default=100000, cast=int),
+        'CULL_FREQUENCY': config('SHARED_CACHE_CULL_FREQUENCY', default=10, cast=int),
+    }
+
+# Authenticated users are read from this cache (keyed by auth0_id) and
+# invalidated on every User save. Must be a shared backend.
+USER_CACHE_ALIAS = config('USER_CACHE_ALIAS', default=SHARED_CACHE_ALIAS)
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=300, cast=int)
+
+# Cached TWR/XIRR results (stocks.services.returns), invalidated on new
+# transactions. Must be a shared backend.
+RETURNS_CACHE_ALIAS = config('RETURNS_CACHE_ALIAS', default=SHARED_CACHE_ALIAS)
+RETURNS_CACHE_TTL = config('RETURNS_CACHE_TTL', default=300, cast=int)
+
+# Symbols users viewed or searched for, read by the price refresher from
+# another process, so this must be a shared backend too. Interest expires
+# after SYMBOL_INTEREST_TTL seconds.
+SYMBOL_INTEREST_CACHE_ALIAS = config('SYMBOL_INTEREST_CACHE_ALIAS', default=SHARED_CACHE_ALIAS)
+SYMBOL_INTEREST_TTL = config('SYMBOL_INTEREST_TTL', default=3600, cast=int)
+
+# Cache holding the shared Finnhub rate-limit windows (FINNHUB_RATE_LIMIT_SHARED).
+# Must be shared, or each process gets the whole budget.
+FINNHUB_RATE_LIMIT_CACHE_ALIAS = config('FINNHUB_RATE_LIMIT_CACHE_ALIAS', default=SHARED_CACHE_ALIAS)
+
+# Caches - locmem by default, point QUOTE_CACHE_BACKEND/LOCATION to a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    FINNHUB_QUOTE_CACHE_ALIAS: {
+        'BACKEND': config('QUOTE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('QUOTE_CACHE_LOCATION', default='finnhub-quotes'),
+        'TIMEOUT': FINNHUB_QUOTE_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': FINNHUB_QUOTE_CACHE_MAX_ENTRIES,
+        },
+    },
+    SHARED_CACHE_ALIAS: SHARED_CACHE,
+    AUTH0_TOKEN_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth0-tokens',
+        'TIMEOUT': AUTH0_TOKEN_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': AUTH0_TOKEN_CACHE_MAX_ENTRIES,
+        },
+    },
+}
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
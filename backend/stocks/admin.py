@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import ReferralBonus, Stock, StockPriceHistory, UserPortfolio, Transaction, UserBalance, ReportRequest
+from .models import (
+    ReferralBonus, Stock, StockPriceHistory, UserPortfolio, Transaction, UserBalance, ReportRequest,
+    PortfolioSnapshot, HoldingSnapshot, LedgerMonthlyRollup
+)
 
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
@@ -86,4 +89,24 @@ class ReferralBonusAdmin(admin.ModelAdmin):
 class ReportRequestAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "format", "status", "created_at", "finished_at")
     list_filter = ("status", "format", "created_at")
-    search_fields = ("user__username", "user__email", "id")
\ No newline at end of file
+    search_fields = ("user__username", "user__email", "id")
+
+@admin.register(PortfolioSnapshot)
+class PortfolioSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'invested_value', 'current_value', 'positions', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
+
+@admin.register(HoldingSnapshot)
+class HoldingSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'stock', 'quantity', 'average_price', 'current_price', 'current_value', 'updated_at']
+    list_filter = ['stock']
+    search_fields = ['user__username', 'stock__symbol']
+    readonly_fields = ['updated_at']
+
+@admin.register(LedgerMonthlyRollup)
+class LedgerMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'transaction_type', 'total_amount', 'total_fee', 'tx_count']
+    list_filter = ['transaction_type', 'month']
+    search_fields = ['user__username']
+    date_hierarchy = 'month'
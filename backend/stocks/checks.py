@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from user_try.checks import PROCESS_LOCAL_BACKENDS
+
+# Caches written by one process and read by others
+SHARED_CACHE_SETTINGS = {
+    'RETURNS_CACHE_ALIAS': 'stocks.E001',
+    'SYMBOL_INTEREST_CACHE_ALIAS': 'stocks.E002',
+}
+
+
+@register()
+def check_stock_caches_are_shared(app_configs, **kwargs):
+    """A transaction or page view in one worker must be seen by every worker and the refresher"""
+    if settings.DEBUG:
+        return []
+    errors = []
+    for name, error_id in SHARED_CACHE_SETTINGS.items():
+        alias = getattr(settings, name)
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_BACKENDS:
+            errors.append(Error(
+                f"{name} '{alias}' uses {backend}, which is per process",
+                hint="Point it at a shared backend (database or Redis cache), e.g. the 'shared' alias.",
+                id=error_id,
+            ))
+    return errors
+
+
+@register()
+def check_rate_limit_cache_is_shared(app_configs, **kwargs):
+    """With a per-process cache every process spends the whole Finnhub budget"""
+    if settings.DEBUG or not settings.FINNHUB_RATE_LIMIT_SHARED:
+        return []
+    alias = settings.FINNHUB_RATE_LIMIT_CACHE_ALIAS
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Error(
+            f"FINNHUB_RATE_LIMIT_SHARED is set but FINNHUB_RATE_LIMIT_CACHE_ALIAS '{alias}' uses {backend}, "
+            f"which is per process",
+            hint="Point it at a shared backend (database or Redis cache), e.g. the 'shared' alias.",
+            id='stocks.E003',
+        )]
+    return []
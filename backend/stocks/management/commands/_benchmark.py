@@ -0,0 +1,113 @@
+"""
+Shared helpers for the benchmark_* management commands: seed a large
+synthetic Transaction ledger for throwaway users and time query shapes.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from stocks.models import Stock, Transaction
+from stocks.services.ledger_rollup import rebuild_rollups
+from user_try.models import User
+
+BENCH_PREFIX = 'bench_'
+
+TYPE_WEIGHTS = [('BUY', 45), ('SELL', 30), ('DEPOSIT', 15), ('WITHDRAWAL', 7), ('REFERRAL', 3)]
+
+
+def get_bench_users():
+    return User.objects.filter(username__startswith=BENCH_PREFIX)
+
+
+def seed_transactions(rows, users, batch_size=10000, days=3 * 365, stdout=None):
+    """
+    Insert `rows` transactions spread over `users` benchmark users and the
+    last `days` days. Rows go in with executemany because created_at is
+    auto_now_add and bulk_create would stamp every row with now(); as that
+    skips the post_save signals, the users' ledger rollups are rebuilt after.
+    """
+    existing = get_bench_users().count()
+    if existing < users:
+        User.objects.bulk_create([
+            User(username=f"{BENCH_PREFIX}{i}", email=f"{BENCH_PREFIX}{i}@example.com")
+            for i in range(existing, users)
+        ], batch_size=1000)
+    user_ids = list(get_bench_users().values_list('id', flat=True)[:users])
+    stock_ids = list(Stock.all_objects.values_list('id', flat=True)) or [None]
+
+    table = Transaction._meta.db_table
+    columns = ['user_id', 'transaction_type', 'stock_id', 'quantity', 'price', 'amount',
+               'transaction_fee', 'created_at', 'updated_at']
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(table)} "
+        f"({', '.join(connection.ops.quote_name(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+    ops = connection.ops
+    rnd = random.Random(42)
+    types, weights = zip(*TYPE_WEIGHTS)
+    now = timezone.now()
+    span = days * 86400
+    started = time.perf_counter()
+    inserted = 0
+
+    while inserted < rows:
+        batch = []
+        for _ in range(min(batch_size, rows - inserted)):
+            tx_type = rnd.choices(types, weights)[0]
+            created = ops.adapt_datetimefield_value(now - timedelta(seconds=rnd.randrange(span)))
+            if tx_type in ('BUY', 'SELL'):
+                quantity = rnd.randint(1, 50)
+                price = Decimal(rnd.randint(1000, 50000)) / 100
+                amount = price * quantity * (-1 if tx_type == 'BUY' else 1)
+                stock_id = rnd.choice(stock_ids)
+            else:
+                quantity, price, stock_id = 0, Decimal('0'), None
+                amount = Decimal(rnd.randint(1000, 500000)) / 100 * (-1 if tx_type == 'WITHDRAWAL' else 1)
+            batch.append((rnd.choice(user_ids), tx_type, stock_id, quantity, str(price), str(amount), '0', created, created))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        inserted += len(batch)
+
+        if stdout and inserted % (batch_size * 20) == 0:
+            elapsed = time.perf_counter() - started
+            stdout.write(f"  {inserted}/{rows} rows ({inserted / elapsed:.0f} rows/s)")
+
+    rebuild_rollups(user_ids)
+    return inserted
+
+
+def cleanup(batch_size=10000):
+    """Delete the benchmark transactions in batches, then the benchmark users"""
+    deleted = 0
+    rows = Transaction.objects.filter(user__in=get_bench_users())
+    while True:
+        ids = list(rows.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Raw delete: per-row post_delete signals would adjust rollups that
+        # are dropped with the users below anyway
+        deleted += Transaction.objects.filter(id__in=ids)._raw_delete(Transaction.objects.db)
+    deleted += get_bench_users().delete()[0]
+    return deleted
+
+
+def time_query(run, repeat=20):
+    """Median and p95 wall time in milliseconds of `run()` over `repeat` runs"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
@@ -0,0 +1,68 @@
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from stocks.services.report_service import ReportService
+from ._benchmark import cleanup, get_bench_users, seed_transactions, time_query
+
+def legacy_cash_flows(transactions):
+    """The previous per-row implementation, kept here as the baseline"""
+    totals = dict.fromkeys(['DEPOSIT', 'WITHDRAWAL', 'BUY', 'SELL', 'REFERRAL', 'FEES'], Decimal('0'))
+    for tx in transactions:
+        try:
+            amt = Decimal(str(tx.amount))
+        except (InvalidOperation, TypeError):
+            amt = Decimal('0')
+        totals['FEES'] += Decimal(str(tx.transaction_fee or 0))
+        if tx.transaction_type in ('WITHDRAWAL', 'BUY'):
+            totals[tx.transaction_type] += -amt if amt < 0 else amt
+        elif tx.transaction_type in totals:
+            totals[tx.transaction_type] += amt
+    return totals
+
+class Command(BaseCommand):
+    help = 'Benchmark report cash-flow computation: per-row Python loop vs monthly ledger rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Transactions to seed for one user')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert batch')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per implementation')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse rows seeded by a previous run')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark users and rows and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.stdout.write(f"Deleted {cleanup(options['batch_size'])} benchmark rows")
+            return
+
+        if not options['skip_seed']:
+            self.stdout.write(f"Seeding {options['rows']} transactions for one user...")
+            seed_transactions(options['rows'], 1, options['batch_size'], stdout=self.stdout)
+
+        user = get_bench_users().annotate(tx_count=Count('transaction')).order_by('-tx_count').first()
+        if user is None:
+            raise CommandError("No benchmark data, run without --skip-seed first")
+        self.stdout.write(f"User {user.username} with {user.tx_count} transactions")
+
+        tx_qs = ReportService._query_transactions(user)
+
+        old = time_query(lambda: legacy_cash_flows(tx_qs.all()), options['repeat'])
+        new = time_query(lambda: ReportService._compute_cash_flows(user), options['repeat'])
+
+        legacy = legacy_cash_flows(tx_qs.all())
+        summary = ReportService._compute_cash_flows(user)
+        matches = (
+            legacy['DEPOSIT'] == summary['total_deposits']
+            and legacy['WITHDRAWAL'] == summary['total_withdrawals']
+            and legacy['BUY'] == summary['total_buys']
+            and legacy['SELL'] == summary['total_sells']
+            and legacy['REFERRAL'] == summary['total_referrals']
+            and legacy['FEES'] == summary['total_fees']
+        )
+
+        self.stdout.write(f"Per-row loop:    median {old['median_ms']:.1f} ms, p95 {old['p95_ms']:.1f} ms")
+        self.stdout.write(f"Ledger rollups:  median {new['median_ms']:.1f} ms, p95 {new['p95_ms']:.1f} ms")
+        self.stdout.write(f"Speedup:         {old['median_ms'] / new['median_ms']:.1f}x")
+        if matches:
+            self.stdout.write(self.style.SUCCESS("Totals match"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Totals differ: {legacy} vs {summary}"))
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+from stocks.models import Transaction
+from ._benchmark import cleanup, get_bench_users, seed_transactions, time_query
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot Transaction query shapes (plans and latency) on a synthetic ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help='Transactions to seed')
+        parser.add_argument('--users', type=int, default=1000, help='Benchmark users the rows are spread over')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert batch')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query shape')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse rows seeded by a previous run')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run every query with the composite indexes dropped, then restore them'
+        )
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark users and rows and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.stdout.write(f"Deleted {cleanup(options['batch_size'])} benchmark rows")
+            return
+
+        if not options['skip_seed']:
+            self.stdout.write(f"Seeding {options['rows']} transactions for {options['users']} users...")
+            seed_transactions(options['rows'], options['users'], options['batch_size'], stdout=self.stdout)
+
+        user = (
+            get_bench_users()
+            .annotate(tx_count=Count('transaction'))
+            .order_by('-tx_count')
+            .first()
+        )
+        if user is None:
+            raise CommandError("No benchmark data, run without --skip-seed first")
+        self.stdout.write(f"Sample user {user.username} with {user.tx_count} transactions "
+                          f"(table: {Transaction.objects.count()} rows)")
+
+        if options['compare']:
+            indexes = Transaction._meta.indexes
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Transaction, index)
+            try:
+                self.stdout.write(self.style.MIGRATE_HEADING("\nWithout composite indexes"))
+                self._run(user, options['repeat'])
+            finally:
+                with connection.schema_editor() as editor:
+                    for index in indexes:
+                        editor.add_index(Transaction, index)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nWith composite indexes"))
+        self._run(user, options['repeat'])
+
+    def _shapes(self, user):
+        end = timezone.now()
+        start = end - timedelta(days=90)
+        return [
+            ('history (user, -created_at, limit 50)',
+             Transaction.objects.filter(user=user).order_by('-created_at')[:50]),
+            ('report range (user, created_at 90d)',
+             Transaction.objects.filter(user=user, created_at__gte=start, created_at__lte=end).order_by('created_at')),
+            ('referral sum (user, type)',
+             Transaction.objects.filter(user=user, transaction_type='REFERRAL').values('user').annotate(total=Sum('amount'))),
+        ]
+
+    def _run(self, user, repeat):
+        for name, qs in self._shapes(user):
+            self.stdout.write(f"\n{name}")
+            self.stdout.write(qs.explain())
+            timing = time_query(lambda: list(qs.all()), repeat)
+            self.stdout.write(self.style.SUCCESS(
+                f"  median {timing['median_ms']:.2f} ms, p95 {timing['p95_ms']:.2f} ms"
+            ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from user_try.models import User
+from stocks.services.ledger_rollup import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly ledger rollups from the transaction table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default=None,
+            help='Username (or id) to rebuild; default is every user'
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            lookup = {'pk': options['user']} if options['user'].isdigit() else {'username': options['user']}
+            users = list(User.objects.filter(**lookup).values_list('id', flat=True))
+            if not users:
+                raise CommandError(f"User {options['user']} not found")
+
+        rows = rebuild_rollups(users)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} monthly rollup rows"))
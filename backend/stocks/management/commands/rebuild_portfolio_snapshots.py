@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from stocks.models import Transaction, UserPortfolio
+from user_try.models import User
+from stocks.services.snapshot_service import SnapshotService
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized portfolio snapshots from the transaction ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default=None,
+            help='Username (or id) to rebuild; default is every user with holdings or trades'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Exit with an error if the ledger disagrees with UserPortfolio'
+        )
+
+    def handle(self, *args, **options):
+        if options['user']:
+            lookup = {'pk': options['user']} if options['user'].isdigit() else {'username': options['user']}
+            users = User.objects.filter(**lookup)
+            if not users.exists():
+                raise CommandError(f"User {options['user']} not found")
+        else:
+            user_ids = set(UserPortfolio.objects.values_list('user_id', flat=True)) | set(
+                Transaction.objects.filter(transaction_type__in=['BUY', 'SELL']).values_list('user_id', flat=True).distinct()
+            )
+            users = User.objects.filter(id__in=user_ids)
+
+        rebuilt = 0
+        mismatched = 0
+        for user in users.iterator():
+            mismatches = SnapshotService.rebuild_user(user)
+            rebuilt += 1
+            if mismatches:
+                mismatched += 1
+                for m in mismatches:
+                    self.stdout.write(self.style.WARNING(
+                        f"{user.username}: stock {m['stock_id']} ledger {m['ledger_quantity']} @ {m['ledger_average_price']} "
+                        f"vs portfolio {m['portfolio_quantity']} @ {m['portfolio_average_price']}"
+                    ))
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt snapshots for {rebuilt} users, {mismatched} with mismatches"))
+
+        if options['check'] and mismatched:
+            raise CommandError(f"{mismatched} users have portfolios that disagree with their transactions")
@@ -0,0 +1,69 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from stocks.services.finnhub_standin import (
+    StandinServer, API_PREFIX, MODE_SYNTHETIC, MODE_RECORD, MODE_REPLAY
+)
+from stocks.services.finnhub_ws_standin import WsStandinServer
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the Finnhub REST API (synthetic, record or replay mode)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument(
+            '--mode',
+            choices=[MODE_SYNTHETIC, MODE_RECORD, MODE_REPLAY],
+            default=MODE_SYNTHETIC,
+            help='synthetic data, record from the real API, or replay recorded fixtures'
+        )
+        parser.add_argument('--fixtures', type=str, default=None, help='Fixture directory for record/replay')
+        parser.add_argument('--upstream', type=str, default='https://finnhub.io/api/v1', help='Real API URL used when recording')
+        parser.add_argument('--latency-ms', type=int, default=0, help='Fixed latency added to every response')
+        parser.add_argument('--jitter-ms', type=int, default=0, help='Random extra latency up to this value')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 502')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+        parser.add_argument('--ws-port', type=int, default=None, help='Also serve the trades websocket on this port')
+        parser.add_argument('--ws-interval-ms', type=int, default=200, help='Delay between trade messages per connection')
+        parser.add_argument('--ws-drop-after', type=float, default=0, help='Close websocket connections after this many seconds (0: never)')
+
+    def handle(self, *args, **options):
+        if options['mode'] in (MODE_RECORD, MODE_REPLAY) and not options['fixtures']:
+            raise CommandError("--fixtures is required in record and replay modes")
+
+        server = StandinServer(
+            (options['host'], options['port']),
+            mode=options['mode'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            fixtures_dir=options['fixtures'],
+            upstream_url=options['upstream'],
+        )
+
+        base_url = f"http://{options['host']}:{options['port']}{API_PREFIX}"
+        self.stdout.write(f"Finnhub stand-in ({options['mode']}) listening, set FINNHUB_BASE_URL={base_url}")
+
+        ws_server = None
+        if options['ws_port'] is not None:
+            ws_server = WsStandinServer(
+                (options['host'], options['ws_port']),
+                interval_ms=options['ws_interval_ms'],
+                drop_after=options['ws_drop_after'],
+            )
+            threading.Thread(target=ws_server.serve_forever, daemon=True).start()
+            self.stdout.write(f"Trades websocket stand-in listening, set FINNHUB_WS_URL=ws://{options['host']}:{options['ws_port']}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Stand-in stopped: {server.counters}")
+            if ws_server is not None:
+                ws_server.shutdown()
+                ws_server.server_close()
+                self.stdout.write(f"Websocket stand-in stopped: {ws_server.counters}")
@@ -0,0 +1,52 @@
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from stocks.services.report_queue import ReportWorker
+
+class Command(BaseCommand):
+    help = 'Generate queued report requests (PENDING -> GENERATING -> COMPLETED/FAILED)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.REPORT_WORKER_CONCURRENCY,
+            help='Reports generated in parallel by this process'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.REPORT_WORKER_POLL_INTERVAL,
+            help='Seconds an idle worker thread waits before polling again'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.REPORT_MAX_ATTEMPTS,
+            help='Attempts per report before it is marked FAILED'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit instead of staying resident'
+        )
+
+    def handle(self, *args, **options):
+        worker = ReportWorker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            max_attempts=options['max_attempts'],
+        )
+
+        def request_stop(signum, frame):
+            self.stdout.write("Stopping after the reports in progress...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(f"Report worker started ({options['concurrency']} threads)")
+        summary = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Report worker stopped: {summary['processed']} processed, {summary['failed']} failed"
+        ))
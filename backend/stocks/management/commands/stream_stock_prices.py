@@ -0,0 +1,67 @@
+import signal
+from django.core.management.base import BaseCommand, CommandError
+from stocks.models import Stock
+from stocks.services.price_refresher import get_priority_stocks
+from stocks.services.price_stream import PriceStreamClient
+
+class Command(BaseCommand):
+    help = 'Stream real-time prices from the Finnhub trades websocket into Stock/StockPriceHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--flush-interval',
+            type=int,
+            default=5,
+            help='Seconds between database flushes of the coalesced ticks'
+        )
+        parser.add_argument(
+            '--symbols',
+            type=str,
+            default='',
+            help='Comma-separated symbols to subscribe to (default: active stocks)'
+        )
+        parser.add_argument(
+            '--max-symbols',
+            type=int,
+            default=50,
+            help='Subscription limit of the Finnhub plan; held stocks are subscribed first'
+        )
+        parser.add_argument(
+            '--url',
+            type=str,
+            default=None,
+            help='Websocket URL (default: FINNHUB_WS_URL), e.g. a local fake server'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import websocket  # noqa: F401
+        except ImportError:
+            raise CommandError("Streaming requires the 'websocket-client' package")
+
+        if options['symbols']:
+            symbols = [s.strip().upper() for s in options['symbols'].split(',') if s.strip()]
+        else:
+            # Held and recently viewed stocks first, then the rest of the universe
+            symbols = list(get_priority_stocks().values_list('symbol', flat=True))
+            for symbol in Stock.objects.filter(is_active=True).values_list('symbol', flat=True):
+                if symbol not in symbols:
+                    symbols.append(symbol)
+
+        symbols = symbols[:options['max_symbols']]
+        if not symbols:
+            raise CommandError("No symbols to stream")
+
+        client = PriceStreamClient(symbols, url=options['url'], flush_interval=options['flush_interval'])
+
+        def stop(signum, frame):
+            client.stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Streaming {len(symbols)} symbols, flushing every {options['flush_interval']}s...")
+        client.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stream stopped: {client.coalescer.ticks} ticks received, {client.flushed} prices written"
+        ))
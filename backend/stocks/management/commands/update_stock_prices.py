@@ -1,45 +1,160 @@
-from django.core.management.base import BaseCommand
-from stocks.models import Stock, StockPriceHistory
-from stocks.services.finnhub_service import FinnhubService
+import signal
 import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from stocks.models import Stock
+from stocks.services.price_refresher import PriceRefresher, get_priority_stocks
+from stocks.services.snapshot_service import SnapshotService
+from stocks.utils import validate_trading_hours
 
 class Command(BaseCommand):
     help = 'Update stock prices from Finnhub API'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.FINNHUB_MAX_WORKERS,
+            help='Concurrent quote fetches (still paced by the Finnhub rate limiter)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Stocks written per bulk update / transaction'
+        )
+        parser.add_argument(
+            '--symbols',
+            type=str,
+            default='',
+            help='Comma-separated symbols to refresh (default: all active stocks)'
+        )
+
+        # Daemon mode
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help='Stay resident and refresh on a market-hours-aware schedule'
+        )
+        parser.add_argument(
+            '--open-interval',
+            type=int,
+            default=60,
+            help='Seconds between refresh cycles while the market is open'
+        )
+        parser.add_argument(
+            '--closed-interval',
+            type=int,
+            default=1800,
+            help='Seconds between refresh cycles on nights, weekends and holidays'
+        )
+        parser.add_argument(
+            '--full-every',
+            type=int,
+            default=10,
+            help='While open, refresh every active stock each N cycles, 0 for never (held '
+                 'and recently viewed stocks are refreshed every cycle)'
+        )
+        parser.add_argument(
+            '--recent-max-age',
+            type=int,
+            default=3600,
+            help='Seconds a viewed symbol stays prioritised (capped by SYMBOL_INTEREST_TTL)'
+        )
+
     def handle(self, *args, **options):
-        service = FinnhubService()
+        if options['full_every'] < 0:
+            raise CommandError("--full-every must be 0 (never) or a positive number of cycles")
+
+        refresher = PriceRefresher(workers=options['workers'], batch_size=options['batch_size'])
+
+        if options['daemon']:
+            return self.run_daemon(refresher, options)
+
         stocks = Stock.objects.filter(is_active=True)
-        
-        self.stdout.write(f"Updating prices for {stocks.count()} stocks...")
-        
-        for stock in stocks:
-            try:
-                quote_data = service.get_stock_quote(stock.symbol)
-                
-                if quote_data and quote_data.get('current_price', 0) > 0:
-                    current_price = quote_data['current_price']
-                    
-                    # Update current price
-                    stock.current_price = current_price
-                    stock.save()
-                    
-                    # Save to price history
-                    StockPriceHistory.objects.create(
-                        stock=stock,
-                        price=current_price
-                    )
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Updated {stock.symbol}: ${current_price}')
-                    )
+
+        if options['symbols']:
+            symbols = [s.strip().upper() for s in options['symbols'].split(',') if s.strip()]
+            stocks = stocks.filter(symbol__in=symbols)
+
+        stocks = list(stocks)
+        self.stdout.write(
+            f"Updating prices for {len(stocks)} stocks "
+            f"({options['workers']} workers, batches of {options['batch_size']})..."
+        )
+        self.refresh(refresher, stocks, options['verbosity'])
+
+    def refresh(self, refresher, stocks, verbosity):
+        summary = refresher.refresh(stocks)
+
+        if verbosity >= 2:
+            for stock in stocks:
+                if stock.symbol in summary['updated_symbols']:
+                    self.stdout.write(self.style.SUCCESS(f'Updated {stock.symbol}: ${stock.current_price}'))
                 else:
-                    self.stdout.write(
-                        self.style.WARNING(f'No price data for {stock.symbol}')
-                    )
-                
-                time.sleep(1)  # Rate limiting for free tier
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Error updating {stock.symbol}: {e}')
-                )
\ No newline at end of file
+                    self.stdout.write(self.style.WARNING(f'No price data for {stock.symbol}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {summary['updated']}/{summary['total']} stocks "
+            f"({summary['skipped']} without data, {summary['failed']} failed) "
+            f"in {summary['elapsed']:.2f}s - {summary['per_second']:.1f} stocks/s"
+        ))
+
+        # Prices written on request paths (trades, portfolio views) skip the snapshots
+        revalued = SnapshotService.revalue_stale()
+        if revalued:
+            self.stdout.write(f"Revalued {revalued} holdings at prices set outside the refresher")
+        return summary
+
+    def run_daemon(self, refresher, options):
+        """
+        Refresh loop that stays resident instead of being cron-invoked.
+        Held and recently viewed stocks are refreshed every cycle, the full
+        universe every --full-every cycles while the market is open and once
+        more right after it closes.
+        """
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write("Price refresh daemon started")
+        cycle = 0
+        was_open = None
+
+        while not self._stopping:
+            close_old_connections()
+            is_open, message = validate_trading_hours()
+
+            full = (
+                cycle == 0
+                or (is_open and options['full_every'] > 0 and cycle % options['full_every'] == 0)
+                or (was_open and not is_open)
+            )
+            if full:
+                stocks = Stock.objects.filter(is_active=True)
+            else:
+                stocks = get_priority_stocks(options['recent_max_age'])
+
+            stocks = list(stocks)
+            self.stdout.write(f"[{message}] {'Full' if full else 'Priority'} refresh of {len(stocks)} stocks")
+            if stocks:
+                try:
+                    self.refresh(refresher, stocks, options['verbosity'])
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'Refresh cycle failed: {e}'))
+
+            was_open = is_open
+            cycle += 1
+            self._sleep(options['open_interval'] if is_open else options['closed_interval'])
+
+        self.stdout.write("Price refresh daemon stopped")
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def _sleep(self, seconds):
+        # Sleep in short steps so a stop signal is honoured promptly
+        deadline = time.monotonic() + seconds
+        while not self._stopping and time.monotonic() < deadline:
+            time.sleep(min(1, deadline - time.monotonic()))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0008_reportrequest'),
+        ('user_try', '0010_user_email_pending_sent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invested_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('current_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('positions', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_snapshot', to='user_try.user')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HoldingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('average_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('current_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('invested_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('current_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='stocks.stock')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holding_snapshots', to='user_try.user')),
+            ],
+            options={
+                'unique_together': {('user', 'stock')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0009_portfoliosnapshot_holdingsnapshot'),
+        ('user_try', '0010_user_email_pending_sent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'created_at'], name='stocks_tx_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', 'created_at'], name='stocks_tx_user_type_idx'),
+        ),
+    ]
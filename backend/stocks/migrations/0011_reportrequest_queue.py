@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0010_transaction_indexes'),
+        ('user_try', '0010_user_email_pending_sent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrequest',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reportrequest',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='reportrequest',
+            index=models.Index(fields=['status', 'run_after'], name='stocks_report_queue_idx'),
+        ),
+    ]
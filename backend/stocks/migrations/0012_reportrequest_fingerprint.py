@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0011_reportrequest_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrequest',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
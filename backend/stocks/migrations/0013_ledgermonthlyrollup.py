@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0012_reportrequest_fingerprint'),
+        ('user_try', '0010_user_email_pending_sent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell'), ('DEPOSIT', 'Deposit'), ('WITHDRAWAL', 'Withdrawal'), ('REFERRAL', 'Referral Bonus')], max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_magnitude', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tx_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_rollups', to='user_try.user')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month', 'transaction_type')},
+            },
+        ),
+    ]
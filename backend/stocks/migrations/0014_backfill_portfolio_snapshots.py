@@ -0,0 +1,56 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Snapshots for every user that already holds stock, from UserPortfolio"""
+    UserPortfolio = apps.get_model('stocks', 'UserPortfolio')
+    PortfolioSnapshot = apps.get_model('stocks', 'PortfolioSnapshot')
+    HoldingSnapshot = apps.get_model('stocks', 'HoldingSnapshot')
+
+    user_ids = (
+        UserPortfolio.objects.exclude(user_id__in=PortfolioSnapshot.objects.values('user_id'))
+        .values_list('user_id', flat=True).distinct()
+    )
+    for user_id in list(user_ids):
+        holdings = []
+        invested_total = Decimal('0')
+        value_total = Decimal('0')
+        positions = 0
+        for stock_id, quantity, average, price in UserPortfolio.objects.filter(user_id=user_id).values_list(
+            'stock_id', 'quantity', 'average_price', 'stock__current_price'
+        ):
+            average = _money(average)
+            invested = _money(quantity * average)
+            value = _money(quantity * _money(price))
+            holdings.append(HoldingSnapshot(
+                user_id=user_id, stock_id=stock_id, quantity=quantity, average_price=average,
+                current_price=_money(price), invested_value=invested, current_value=value,
+            ))
+            invested_total += invested
+            value_total += value
+            positions += 1 if quantity > 0 else 0
+
+        HoldingSnapshot.objects.filter(user_id=user_id).delete()
+        HoldingSnapshot.objects.bulk_create(holdings)
+        PortfolioSnapshot.objects.create(
+            user_id=user_id, invested_value=invested_total, current_value=value_total, positions=positions,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0013_ledgermonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0014_backfill_portfolio_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockpricehistory',
+            index=models.Index(fields=['stock', 'timestamp'], name='stocks_price_stock_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import Abs, TruncMonth
+
+CENT = Decimal('0.01')
+
+
+def backfill_rollups(apps, schema_editor):
+    """Monthly rollups for every existing transaction, as rebuild_rollups() computes them"""
+    Transaction = apps.get_model('stocks', 'Transaction')
+    LedgerMonthlyRollup = apps.get_model('stocks', 'LedgerMonthlyRollup')
+
+    grouped = (
+        Transaction.objects.order_by()
+        .annotate(period=TruncMonth('created_at', tzinfo=dt_timezone.utc))
+        .values('user_id', 'period', 'transaction_type')
+        .annotate(
+            total=Sum('amount'), magnitude=Sum(Abs('amount')),
+            fees=Sum('transaction_fee'), count=Count('id'),
+        )
+    )
+
+    # Rows written by the signal since 0013 only cover part of the ledger
+    LedgerMonthlyRollup.objects.all().delete()
+    LedgerMonthlyRollup.objects.bulk_create(
+        (
+            LedgerMonthlyRollup(
+                user_id=row['user_id'],
+                month=row['period'].astimezone(dt_timezone.utc).date().replace(day=1),
+                transaction_type=row['transaction_type'],
+                total_amount=Decimal(row['total'] or 0).quantize(CENT),
+                total_magnitude=Decimal(row['magnitude'] or 0).quantize(CENT),
+                total_fee=Decimal(row['fees'] or 0).quantize(CENT),
+                tx_count=row['count'],
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0015_stockpricehistory_stock_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0016_backfill_ledger_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='previous_close',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -48,6 +48,8 @@ class Stock(SoftDeleteModel):
     exchange = models.CharField(max_length=50, default='NASDAQ')
     sector = models.CharField(max_length=100, blank=True, null=True)
     current_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Previous session close from the last refresh, for the daily change
+    previous_close = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     market_cap = models.BigIntegerField(null=True, blank=True)
     volume = models.BigIntegerField(null=True, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
@@ -68,6 +70,10 @@ class StockPriceHistory(models.Model):
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'Stock price history'
+        indexes = [
+            # Per-stock date ranges and latest-before lookups (analytics)
+            models.Index(fields=['stock', 'timestamp'], name='stocks_price_stock_ts_idx'),
+        ]
 
 
 class UserPortfolio(SoftDeleteModel):
@@ -105,6 +111,12 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # History view and report date ranges: user + created_at order/range
+            models.Index(fields=['user', 'created_at'], name='stocks_tx_user_created_idx'),
+            # Per-type aggregates (referral earnings/stats), optionally by date
+            models.Index(fields=['user', 'transaction_type', 'created_at'], name='stocks_tx_user_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - {self.amount}"
@@ -119,6 +131,65 @@ class UserBalance(models.Model):
         return f"{self.user.username} - ${self.balance}"
 
 
+class PortfolioSnapshot(models.Model):
+    """
+    Materialized portfolio totals per user, maintained incrementally by
+    trades and price refreshes (see stocks.services.snapshot_service).
+    """
+    user = models.OneToOneField(UserModel, on_delete=models.CASCADE, related_name='portfolio_snapshot')
+    invested_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    current_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    positions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def profit_loss(self):
+        return self.current_value - self.invested_value
+    
+    def __str__(self):
+        return f"{self.user.username} - ${self.current_value}"
+
+
+class HoldingSnapshot(models.Model):
+    """Materialized valuation of one holding, kept in step with UserPortfolio"""
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='holding_snapshots')
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    average_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    invested_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    current_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'stock']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.stock.symbol} x {self.quantity}"
+
+
+class LedgerMonthlyRollup(models.Model):
+    """
+    Per-user, per-month (UTC), per-type Transaction totals, maintained on
+    every insert (see stocks.services.ledger_rollup).
+    """
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='ledger_rollups')
+    month = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Sum of |amount|; withdrawals and buys are stored negative
+    total_magnitude = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_fee = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tx_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'month', 'transaction_type']
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m} - {self.transaction_type}: {self.total_amount}"
+
+
 class ReferralBonus(models.Model):
     """
     Track referral bonuses given to users
@@ -200,9 +271,17 @@ class ReportRequest(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'csv'])]
     )
     error_message = models.TextField(null=True, blank=True)
+    # Hash of the inputs the file was built from (see ReportService.fingerprint)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Queue bookkeeping for run_report_worker
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='stocks_report_queue_idx'),
+        ]
 
     def __str__(self):
         dr = self.date_from.isoformat() if self.date_from else "beginning"
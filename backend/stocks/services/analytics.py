@@ -0,0 +1,259 @@
+# stocks/services/analytics.py
+"""
+Portfolio analytics over StockPriceHistory, computed with NumPy.
+
+Holdings and prices are loaded once into (business day x stock) arrays;
+value series, returns and risk metrics are then derived with array
+operations instead of per-row Decimal arithmetic.
+"""
+from datetime import date, datetime, time, timedelta
+import logging
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from stocks.models import Stock, StockPriceHistory, Transaction
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+def business_days(start, end):
+    """Business days between start and end (inclusive) as datetime64[D]"""
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    return days[np.is_busday(days)]
+
+
+def day_start(day):
+    """Aware datetime at the start of a datetime64[D] day, for index-friendly range filters"""
+    return timezone.make_aware(datetime.combine(day.item(), time.min))
+
+
+def day_index(days, dates):
+    """Index of each date in the business-day grid; weekend dates roll forward"""
+    rolled = np.busday_offset(np.asarray(dates, dtype='datetime64[D]'), 0, roll='forward')
+    return np.busday_count(days[0], rolled)
+
+
+def _forward_fill(matrix, initial):
+    """Carry the last known price forward; before the first one use initial"""
+    filled = np.where(np.isnan(matrix[:1]), initial, matrix[:1])
+    matrix = np.vstack([filled, matrix[1:]])
+    valid = ~np.isnan(matrix)
+    rows = np.where(valid, np.arange(matrix.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return matrix[rows, np.arange(matrix.shape[1])]
+
+
+def load_price_matrix(stock_ids, days):
+    """
+    Daily closing prices (last StockPriceHistory row of each day) as a
+    (days x stocks) float array, forward filled. Stocks without any
+    history before or during the range fall back to Stock.current_price.
+    """
+    n_days, n_stocks = len(days), len(stock_ids)
+    column = {stock_id: i for i, stock_id in enumerate(stock_ids)}
+    matrix = np.full((n_days, n_stocks), np.nan)
+    if not n_stocks:
+        return matrix
+
+    in_range = StockPriceHistory.objects.filter(
+        stock_id__in=stock_ids, timestamp__gte=day_start(days[0]), timestamp__lt=day_start(days[-1] + 1)
+    )
+    # The database picks the last row of each (stock, day), so only one row
+    # per stock and day is loaded. timestamp is auto_now_add: the highest id
+    # of a day is its latest row.
+    closing_ids = (
+        in_range.annotate(day=TruncDate('timestamp'))
+        .order_by()
+        .values('stock_id', 'day')
+        .annotate(last_id=Max('id'))
+        .values('last_id')
+    )
+    rows = list(
+        StockPriceHistory.objects
+        .filter(id__in=Subquery(closing_ids))
+        .annotate(day=TruncDate('timestamp'))
+        .order_by('timestamp', 'id')
+        .values_list('stock_id', 'day', 'price')
+    )
+    if rows:
+        ids, dates, prices = zip(*rows)
+        cols = np.fromiter((column[i] for i in ids), dtype=np.int64, count=len(ids))
+        idx = day_index(days, dates)
+        keep = idx < n_days
+        cols, idx = cols[keep], idx[keep]
+        prices = np.asarray(prices, dtype=float)[keep]
+
+        # Weekend closes roll forward onto Monday: keep the last per (day, stock)
+        keys = idx * n_stocks + cols
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        matrix[idx[last], cols[last]] = prices[last]
+
+    # Opening price: last row before the range, if there is one
+    before = StockPriceHistory.objects.filter(
+        stock_id=OuterRef('pk'), timestamp__lt=day_start(days[0])
+    ).order_by('-timestamp').values('price')[:1]
+    initial = np.full(n_stocks, np.nan)
+    current = np.zeros(n_stocks)
+    for stock_id, previous, current_price in (
+        Stock.all_objects.filter(id__in=stock_ids)
+        .annotate(previous=Subquery(before))
+        .values_list('id', 'previous', 'current_price')
+    ):
+        if previous is not None:
+            initial[column[stock_id]] = float(previous)
+        current[column[stock_id]] = float(current_price or 0)
+
+    matrix = _forward_fill(matrix, initial)
+
+    # Before a stock's first observation use that observation; with no
+    # history at all use its current price
+    missing = np.isnan(matrix)
+    if missing.any():
+        first = matrix[np.argmax(~missing, axis=0), np.arange(n_stocks)]
+        first = np.where(np.isnan(first), current, first)
+        matrix = np.where(missing, first, matrix)
+    return matrix
+
+
+def load_positions(user, days):
+    """
+    Quantity held per (day, stock) and the net cash put into positions
+    each day (buys minus sells), from the user's BUY/SELL transactions.
+    Returns (stock_ids, quantities, flows).
+    """
+    rows = list(
+        Transaction.objects
+        .filter(user=user, transaction_type__in=['BUY', 'SELL'], stock__isnull=False,
+                created_at__lt=day_start(days[-1] + 1))
+        .annotate(day=TruncDate('created_at'))
+        .values_list('stock_id', 'transaction_type', 'day', 'quantity', 'amount')
+    )
+    n_days = len(days)
+    if not rows:
+        return [], np.zeros((n_days, 0)), np.zeros(n_days)
+
+    ids, types, dates, quantities, amounts = zip(*rows)
+    stock_ids = sorted(set(ids))
+    column = {stock_id: i for i, stock_id in enumerate(stock_ids)}
+    cols = np.fromiter((column[i] for i in ids), dtype=np.int64, count=len(ids))
+
+    sign = np.where(np.asarray(types) == 'BUY', 1.0, -1.0)
+    # Trades before the range all land on day 0 as the opening position
+    idx = np.clip(day_index(days, dates), 0, None)
+    before_start = np.asarray(dates, dtype='datetime64[D]') < days[0]
+
+    deltas = np.zeros((n_days, len(stock_ids)))
+    np.add.at(deltas, (idx, cols), sign * np.asarray(quantities, dtype=float))
+    quantity = np.cumsum(deltas, axis=0)
+
+    # BUY amounts are negative (cash out), SELL positive; flow into the portfolio is -amount
+    flows = np.zeros(n_days)
+    in_range = ~before_start
+    np.add.at(flows, idx[in_range], -np.asarray(amounts, dtype=float)[in_range])
+    return stock_ids, quantity, flows
+
+
+def compute_metrics(values, flows, benchmark=None, risk_free_rate=0.0):
+    """
+    Risk and return metrics for a daily value series.
+
+    Daily returns are flow-adjusted, r_t = (V_t - F_t) / V_{t-1} - 1, so
+    buying or selling shares does not count as performance. benchmark is
+    an optional price series aligned with values, used for beta.
+    """
+    values = np.asarray(values, dtype=float)
+    flows = np.asarray(flows, dtype=float)
+
+    previous = values[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, (values[1:] - flows[1:]) / previous - 1, 0.0)
+
+    growth = np.cumprod(1 + returns)
+    total_return = float(growth[-1] - 1) if len(growth) else 0.0
+    periods = len(returns)
+
+    volatility = float(np.std(returns, ddof=1) * math.sqrt(TRADING_DAYS)) if periods > 1 else None
+    annualized = float((1 + total_return) ** (TRADING_DAYS / periods) - 1) if periods and total_return > -1 else None
+
+    max_drawdown = 0.0
+    if periods:
+        index = np.concatenate([[1.0], growth])
+        peaks = np.maximum.accumulate(index)
+        max_drawdown = float(np.min(index / peaks - 1))
+
+    sharpe = None
+    if volatility:
+        excess = returns - risk_free_rate / TRADING_DAYS
+        sharpe = float(np.mean(excess) / np.std(returns, ddof=1) * math.sqrt(TRADING_DAYS))
+
+    beta = None
+    if benchmark is not None and periods > 1:
+        bench = np.asarray(benchmark, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bench_returns = np.where(bench[:-1] > 0, bench[1:] / bench[:-1] - 1, 0.0)
+        variance = np.var(bench_returns, ddof=1)
+        if variance > 0:
+            beta = float(np.cov(returns, bench_returns, ddof=1)[0, 1] / variance)
+
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized,
+        'volatility': volatility,
+        'max_drawdown': max_drawdown,
+        'sharpe': sharpe,
+        'beta': beta,
+        'returns': returns,
+    }
+
+
+def get_portfolio_analytics(user, date_from=None, date_to=None, include_series=False):
+    """
+    Value series and risk metrics for the user's portfolio between
+    date_from and date_to (default: the last ANALYTICS_DEFAULT_DAYS days).
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=settings.ANALYTICS_DEFAULT_DAYS)
+
+    days = business_days(date_from, date_to)
+    if len(days) < 2:
+        raise ValueError("Date range must span at least two business days")
+
+    stock_ids, quantity, flows = load_positions(user, days)
+    prices = load_price_matrix(stock_ids, days)
+    values = (quantity * prices).sum(axis=1)
+
+    benchmark_symbol = settings.ANALYTICS_BENCHMARK_SYMBOL
+    benchmark = None
+    benchmark_id = Stock.all_objects.filter(symbol=benchmark_symbol).values_list('id', flat=True).first()
+    if benchmark_id is not None:
+        benchmark = load_price_matrix([benchmark_id], days)[:, 0]
+        if not benchmark.any():
+            benchmark = None
+
+    metrics = compute_metrics(values, flows, benchmark, settings.ANALYTICS_RISK_FREE_RATE)
+    returns = metrics.pop('returns')
+
+    result = {
+        'date_from': days[0].item(),
+        'date_to': days[-1].item(),
+        'days': len(days),
+        'positions': len(stock_ids),
+        'start_value': float(values[0]),
+        'end_value': float(values[-1]),
+        'benchmark': benchmark_symbol if benchmark is not None else None,
+        **metrics,
+    }
+    if include_series:
+        result['series'] = [
+            {'date': day.item(), 'value': round(float(value), 2), 'return': float(r)}
+            for day, value, r in zip(days, values, np.concatenate([[0.0], returns]))
+        ]
+    return result
@@ -0,0 +1,107 @@
+# stocks/services/circuit_breaker.py
+import time
+import threading
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream API while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    CLOSED: calls go through; consecutive failures are counted.
+    OPEN: calls are short-circuited until reset_timeout has elapsed.
+    HALF_OPEN: a single probe call is let through; success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.short_circuited = 0
+
+    def allow_request(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return True
+
+            # Let a new probe through if the previous one never reported back
+            if self.state == self.HALF_OPEN and now - self.probe_started_at >= self.reset_timeout:
+                self.probe_started_at = now
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def before_call(self):
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker guarding Finnhub calls"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    'finnhub',
+                    failure_threshold=settings.FINNHUB_BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout=settings.FINNHUB_BREAKER_RESET_TIMEOUT,
+                )
+    return _breaker
@@ -1,18 +1,179 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.db import connections
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from stocks.models import Stock
+from stocks.services.quote_cache import get_quote_cache
+from stocks.services.rate_limiter import get_rate_limiter, RateLimitExceeded, PRIORITY_INTERACTIVE
+from stocks.services.circuit_breaker import get_circuit_breaker, CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide requests.Session used for every Finnhub call.
+    Connections are kept alive and pooled, and idempotent GETs are retried
+    with exponential backoff on transient 5xx errors. Read timeouts are not
+    retried so a slow upstream cannot hold a worker for several timeouts.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.FINNHUB_RETRIES,
+                    read=0,
+                    backoff_factor=settings.FINNHUB_RETRY_BACKOFF,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET']),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=settings.FINNHUB_POOL_CONNECTIONS,
+                    pool_maxsize=settings.FINNHUB_POOL_MAXSIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get_session_stats():
+    """Connection reuse metrics for the shared session, per upstream host"""
+    if _session is None:
+        return {'pools': [], 'requests': 0, 'connections': 0, 'reused': 0}
+
+    adapter = _session.get_adapter('https://')
+    pools = adapter.poolmanager.pools
+    stats = []
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        stats.append({
+            'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+            'requests': pool.num_requests,
+            'connections': pool.num_connections,
+            'reused': max(pool.num_requests - pool.num_connections, 0),
+        })
+
+    total_requests = sum(p['requests'] for p in stats)
+    total_connections = sum(p['connections'] for p in stats)
+    return {
+        'pools': stats,
+        'requests': total_requests,
+        'connections': total_connections,
+        'reused': max(total_requests - total_connections, 0),
+    }
+
+
 class FinnhubService:
-    BASE_URL = "https://finnhub.io/api/v1"
     
-    def __init__(self):
+    def __init__(self, priority=PRIORITY_INTERACTIVE):
+        # Switchable so the app can run against a local stand-in (run_finnhub_standin)
+        self.BASE_URL = settings.FINNHUB_BASE_URL
         self.api_key = settings.FINNHUB_API_KEY
+        self.session = get_session()
+        # Rate limiter priority class for every call made by this instance
+        self.priority = priority
     
+    def _request(self, url, params):
+        """
+        Perform a rate-limited GET against Finnhub over the shared pooled session.
+        Raises CircuitOpenError without calling out while the circuit breaker is open.
+        """
+        breaker = get_circuit_breaker()
+        breaker.before_call()
+        get_rate_limiter().acquire(self.priority)
+
+        try:
+            response = self.session.get(
+                url,
+                params=params,
+                timeout=(settings.FINNHUB_CONNECT_TIMEOUT, settings.FINNHUB_TIMEOUT),
+            )
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
     def get_stock_quote(self, symbol):
-        """Get real-time stock quote with PROPER validation"""
+        """Get real-time stock quote, served from the shared quote cache while fresh"""
+        return get_quote_cache().get_or_fetch(symbol.upper(), self._fetch_stock_quote)
+
+    def get_stock_quotes(self, symbols, max_workers=None):
+        """
+        Get quotes for many symbols at once.
+        Cached quotes are served first, the misses are fetched concurrently
+        by a bounded worker pool (FINNHUB_MAX_WORKERS unless max_workers is
+        given). Returns {symbol: quote or None}.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols if s))
+        if not symbols:
+            return {}
+
+        quotes = get_quote_cache().get_many(symbols)
+        missing = [s for s in symbols if s not in quotes]
+
+        if missing:
+            workers = min(max_workers or settings.FINNHUB_MAX_WORKERS, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for symbol, quote in zip(missing, pool.map(self._get_stock_quote_in_worker, missing)):
+                    quotes[symbol] = quote
+
+        return quotes
+
+    def _get_stock_quote_in_worker(self, symbol):
+        try:
+            # Already counted as a miss by get_many()
+            return get_quote_cache().get_or_fetch(symbol, self._fetch_stock_quote, counted=True)
+        finally:
+            # The stale fallback may have opened a DB connection in this thread
+            connections.close_all()
+
+    def _stale_quote(self, symbol):
+        """
+        Last known quote for a symbol, marked as stale, used while Finnhub
+        is unavailable. Falls back to Stock.current_price.
+        """
+        quote = get_quote_cache().get_last_known(symbol)
+
+        if quote is None:
+            stock = Stock.all_objects.filter(symbol=symbol.upper()).only('current_price', 'last_updated').first()
+            if not stock or not stock.current_price:
+                return None
+            quote = {
+                'current_price': float(stock.current_price),
+                'change': 0,
+                'percent_change': 0,
+                'high': 0,
+                'low': 0,
+                'open': 0,
+                'previous_close': 0,
+                'as_of': stock.last_updated.timestamp() if stock.last_updated else None,
+            }
+
+        return dict(quote, stale=True)
+
+    def _fetch_stock_quote(self, symbol):
+        """Fetch a stock quote from Finnhub with PROPER validation"""
         try:
             url = f"{self.BASE_URL}/quote"
             params = {
@@ -20,7 +181,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -52,9 +213,15 @@ class FinnhubService:
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
                 logger.error(f"Finnhub API rate limit exceeded for symbol {symbol}")
-            else:
-                logger.error(f"HTTP error getting stock quote for {symbol}: {e}")
+                return self._stale_quote(symbol)
+            elif e.response.status_code >= 500:
+                logger.error(f"Finnhub unavailable getting stock quote for {symbol}: {e}")
+                return self._stale_quote(symbol)
+            logger.error(f"HTTP error getting stock quote for {symbol}: {e}")
             return None
+        except (CircuitOpenError, RateLimitExceeded, requests.exceptions.RequestException) as e:
+            logger.warning(f"Serving stale quote for {symbol}: {e}")
+            return self._stale_quote(symbol)
         except Exception as e:
             logger.error(f"Error getting stock quote for {symbol}: {e}")
             return None
@@ -91,7 +258,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -110,7 +277,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -141,7 +308,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -174,7 +341,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             return response.json()
@@ -192,7 +359,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             return response.json()
@@ -210,7 +377,7 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request(url, params)
             response.raise_for_status()
             
             return response.json()
@@ -0,0 +1,254 @@
+# stocks/services/finnhub_standin.py
+"""
+Local stand-in for the Finnhub REST endpoints used by FinnhubService.
+
+Point FINNHUB_BASE_URL at it (e.g. http://127.0.0.1:8090/api/v1) to run the
+app and load tests offline. Three modes:
+- synthetic: deterministic fake data generated per symbol
+- record: proxy to the real API and save every response as a fixture
+- replay: serve only previously recorded fixtures
+Latency, 5xx errors and 429 throttling can be injected in every mode.
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v1'
+
+MODE_SYNTHETIC = 'synthetic'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+
+def _seed(symbol):
+    return int(hashlib.sha1(symbol.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def _base_price(symbol):
+    return 20 + _seed(symbol) % 480
+
+
+def synthetic_quote(symbol):
+    rnd = random.Random(_seed(symbol) + int(time.time()))
+    previous_close = _base_price(symbol)
+    current = round(previous_close * (1 + rnd.uniform(-0.03, 0.03)), 2)
+    return {
+        'c': current,
+        'd': round(current - previous_close, 2),
+        'dp': round((current - previous_close) / previous_close * 100, 4),
+        'h': round(max(current, previous_close) * 1.01, 2),
+        'l': round(min(current, previous_close) * 0.99, 2),
+        'o': previous_close,
+        'pc': previous_close,
+        't': int(time.time()),
+    }
+
+
+def synthetic_profile(symbol):
+    seed = _seed(symbol)
+    return {
+        'name': f"{symbol} Corporation",
+        'ticker': symbol,
+        'exchange': 'NASDAQ' if seed % 2 else 'NYSE',
+        'currency': 'USD',
+        'country': 'US',
+        'finnhubIndustry': ['Technology', 'Banking', 'Retail', 'Energy', 'Health Care'][seed % 5],
+        'marketCapitalization': float(1000 + seed % 900000),
+        'shareOutstanding': float(10 + seed % 5000),
+        'ipo': '2000-01-01',
+        'weburl': f"https://www.{symbol.lower()}.example.com",
+        'logo': '',
+    }
+
+
+def synthetic_candles(symbol, date_from, date_to, resolution='D'):
+    step = 86400 if resolution in ('D', 'W', 'M') else 60 * int(resolution or 1)
+    rnd = random.Random(_seed(symbol))
+    price = _base_price(symbol)
+    candles = {'s': 'ok', 't': [], 'o': [], 'h': [], 'l': [], 'c': [], 'v': []}
+    for ts in range(int(date_from), int(date_to), step):
+        close = round(max(price * (1 + rnd.uniform(-0.02, 0.02)), 1), 2)
+        candles['t'].append(ts)
+        candles['o'].append(price)
+        candles['h'].append(round(max(price, close) * 1.005, 2))
+        candles['l'].append(round(min(price, close) * 0.995, 2))
+        candles['c'].append(close)
+        candles['v'].append(rnd.randint(100000, 5000000))
+        price = close
+    if not candles['t']:
+        return {'s': 'no_data'}
+    return candles
+
+
+SYNTHETIC_UNIVERSE = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'TSLA', 'NVDA', 'JPM', 'V', 'WMT']
+
+
+def synthetic_response(path, params):
+    """Return (status, body) for a synthetic request"""
+    symbol = params.get('symbol', '').upper()
+
+    if path == '/quote':
+        return 200, synthetic_quote(symbol) if symbol else {'c': 0, 'd': None, 'dp': None, 'h': 0, 'l': 0, 'o': 0, 'pc': 0}
+    if path == '/stock/profile2':
+        return 200, synthetic_profile(symbol) if symbol else {}
+    if path == '/stock/candle':
+        return 200, synthetic_candles(symbol, params.get('from', 0), params.get('to', 0), params.get('resolution', 'D'))
+    if path == '/search':
+        query = params.get('q', '').upper()
+        result = [
+            {'description': f"{s} Corporation", 'displaySymbol': s, 'symbol': s, 'type': 'Common Stock'}
+            for s in SYNTHETIC_UNIVERSE if query in s
+        ]
+        return 200, {'count': len(result), 'result': result}
+    if path == '/news':
+        now = int(time.time())
+        return 200, [
+            {
+                'category': params.get('category', 'general'), 'datetime': now - i * 600,
+                'headline': f"Synthetic market headline #{i}", 'id': i, 'image': '',
+                'related': '', 'source': 'stand-in', 'summary': '', 'url': 'https://example.com',
+            }
+            for i in range(30)
+        ]
+    if path == '/stock/recommendation':
+        return 200, [
+            {'symbol': symbol, 'period': '2025-01-01', 'strongBuy': 10, 'buy': 15, 'hold': 8, 'sell': 2, 'strongSell': 0}
+        ]
+    if path == '/stock/symbol':
+        return 200, [
+            {'currency': 'USD', 'description': f"{s} Corporation", 'displaySymbol': s, 'symbol': s, 'type': 'Common Stock'}
+            for s in SYNTHETIC_UNIVERSE
+        ]
+    return 404, {'error': f"Unknown endpoint {path}"}
+
+
+class FixtureStore:
+    """Recorded responses on disk, one JSON file per (path, params)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _key_params(path, params):
+        # get_stock_candles derives from/to from now(), so absolute timestamps
+        # never repeat between record and replay: key on the window instead
+        if path.rstrip('/').endswith('/stock/candle') and 'from' in params and 'to' in params:
+            params = dict(params)
+            try:
+                span = int(params.pop('to')) - int(params.pop('from'))
+            except ValueError:
+                return params
+            params['span_days'] = round(span / 86400)
+        return params
+
+    def _path(self, path, params):
+        key = json.dumps(sorted(self._key_params(path, params).items()))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        name = path.strip('/').replace('/', '_') or 'root'
+        return os.path.join(self.directory, f"{name}__{digest}.json")
+
+    def load(self, path, params):
+        try:
+            with open(self._path(path, params), encoding='utf-8') as fh:
+                fixture = json.load(fh)
+            return fixture['status'], fixture['body']
+        except FileNotFoundError:
+            return None
+
+    def save(self, path, params, status, body):
+        with open(self._path(path, params), 'w', encoding='utf-8') as fh:
+            json.dump({'path': path, 'params': params, 'status': status, 'body': body}, fh)
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, mode=MODE_SYNTHETIC, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, throttle_rate=0.0, fixtures_dir=None,
+                 upstream_url='https://finnhub.io/api/v1'):
+        super().__init__(address, StandinHandler)
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.fixtures = FixtureStore(fixtures_dir) if fixtures_dir else None
+        self.upstream_url = upstream_url.rstrip('/')
+
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'throttled': 0, 'recorded': 0, 'replayed': 0, 'missing': 0}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'FinnhubStandin/1.0'
+
+    def log_message(self, fmt, *args):
+        logger.debug(fmt % args)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+
+        url = urlparse(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        params = dict(parse_qsl(url.query))
+        token = params.pop('token', None)
+
+        delay = server.latency_ms + (random.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if server.throttle_rate and random.random() < server.throttle_rate:
+            server.count('throttled')
+            return self._send(429, {'error': 'API limit reached. Please try again later.'})
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('errors')
+            return self._send(502, {'error': 'Injected upstream error'})
+
+        if server.mode == MODE_REPLAY:
+            fixture = server.fixtures.load(path, params) if server.fixtures else None
+            if fixture is None:
+                server.count('missing')
+                return self._send(404, {'error': f"No fixture recorded for {path} {params}"})
+            server.count('replayed')
+            return self._send(*fixture)
+
+        if server.mode == MODE_RECORD:
+            response = requests.get(
+                f"{server.upstream_url}{path}",
+                params=dict(params, token=token),
+                timeout=30,
+            )
+            try:
+                body = response.json()
+            except ValueError:
+                body = {'error': response.text}
+            if response.status_code == 200 and server.fixtures:
+                server.fixtures.save(path, params, response.status_code, body)
+                server.count('recorded')
+            return self._send(response.status_code, body)
+
+        return self._send(*synthetic_response(path, params))
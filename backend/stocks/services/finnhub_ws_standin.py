@@ -0,0 +1,210 @@
+# stocks/services/finnhub_ws_standin.py
+"""
+Local stand-in for the Finnhub trades websocket used by PriceStreamClient.
+
+Point FINNHUB_WS_URL (or stream_stock_prices --url) at it, e.g.
+ws://127.0.0.1:8091, to run price ingestion offline. Clients subscribe with
+{"type": "subscribe", "symbol": ...} like on Finnhub; every interval the
+server sends each connection one {"type": "trade", "data": [...]} message
+with a few synthetic trades per subscribed symbol (a random walk from the
+same base prices as the REST stand-in), plus a {"type": "ping"} now and
+then. Connections can be dropped after a while to exercise reconnects.
+
+Only the parts of RFC 6455 a websocket-client connection needs are
+implemented (text, ping/pong and close frames, no extensions), so there is
+no server-side dependency.
+"""
+import json
+import time
+import base64
+import random
+import struct
+import hashlib
+import logging
+import threading
+import socketserver
+
+from stocks.services.finnhub_standin import _base_price, _seed
+
+logger = logging.getLogger(__name__)
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def encode_frame(payload, opcode=OP_TEXT):
+    """A single unmasked (server to client) frame"""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class WsStandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, interval_ms=200, trades_per_symbol=3, ping_every=10, drop_after=0):
+        super().__init__(address, WsStandinHandler)
+        self.interval = interval_ms / 1000.0
+        self.trades_per_symbol = trades_per_symbol
+        self.ping_every = ping_every
+        # Close each connection after this many seconds (0: never)
+        self.drop_after = drop_after
+
+        self._lock = threading.Lock()
+        self._prices = {}
+        self.counters = {'connections': 0, 'subscriptions': 0, 'messages': 0, 'trades': 0, 'dropped': 0}
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def next_trades(self, symbol, rnd):
+        """A few synthetic trades continuing the symbol's random walk"""
+        now_ms = int(time.time() * 1000)
+        trades = []
+        with self._lock:
+            price = self._prices.get(symbol, float(_base_price(symbol)))
+            for i in range(self.trades_per_symbol):
+                price = round(max(price * (1 + rnd.uniform(-0.002, 0.002)), 0.01), 2)
+                trades.append({'s': symbol, 'p': price, 'v': rnd.randint(1, 500), 't': now_ms + i, 'c': None})
+            self._prices[symbol] = price
+        return trades
+
+
+class WsStandinHandler(socketserver.BaseRequestHandler):
+
+    def setup(self):
+        self.symbols = set()
+        self.closed = threading.Event()
+        self._send_lock = threading.Lock()
+
+    def _recv_exact(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def _handshake(self):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        headers = {}
+        for line in request.decode('latin-1').split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self.request.sendall(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            return False
+        self.request.sendall((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n'
+        ).encode('ascii'))
+        return True
+
+    def _read_frame(self):
+        first, second = self._recv_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if second & 0x80 else None
+        payload = self._recv_exact(length) if length else b''
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def send(self, payload, opcode=OP_TEXT):
+        with self._send_lock:
+            self.request.sendall(encode_frame(payload, opcode))
+
+    def _publish(self):
+        """Per-connection sender: one trade message per interval"""
+        server = self.server
+        rnd = random.Random(_seed(str(self.client_address)))
+        started = time.monotonic()
+        sent = 0
+        try:
+            while not self.closed.wait(server.interval):
+                if server.drop_after and time.monotonic() - started >= server.drop_after:
+                    server.count('dropped')
+                    self.send(struct.pack('!H', 1001) + b'stand-in drop', OP_CLOSE)
+                    break
+                data = [trade for symbol in sorted(self.symbols) for trade in server.next_trades(symbol, rnd)]
+                if data:
+                    self.send(json.dumps({'type': 'trade', 'data': data}))
+                    server.count('messages')
+                    server.count('trades', len(data))
+                sent += 1
+                if server.ping_every and sent % server.ping_every == 0:
+                    self.send(json.dumps({'type': 'ping'}))
+        except OSError:
+            pass
+        finally:
+            self.closed.set()
+            try:
+                self.request.shutdown(2)
+            except OSError:
+                pass
+
+    def handle(self):
+        if not self._handshake():
+            return
+        self.server.count('connections')
+        publisher = threading.Thread(target=self._publish, daemon=True)
+        publisher.start()
+        try:
+            while not self.closed.is_set():
+                opcode, payload = self._read_frame()
+                if opcode == OP_CLOSE:
+                    self.send(payload[:2], OP_CLOSE)
+                    break
+                if opcode == OP_PING:
+                    self.send(payload, OP_PONG)
+                elif opcode == OP_TEXT:
+                    self._on_text(payload)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.closed.set()
+            publisher.join(timeout=1)
+
+    def _on_text(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        symbol = str(message.get('symbol') or '').upper()
+        if not symbol:
+            return
+        if message.get('type') == 'subscribe':
+            self.symbols.add(symbol)
+            self.server.count('subscriptions')
+        elif message.get('type') == 'unsubscribe':
+            self.symbols.discard(symbol)
@@ -0,0 +1,83 @@
+# stocks/services/instrument_service.py
+import logging
+
+from stocks.models import Stock
+from stocks.services.finnhub_service import FinnhubService
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentResolutionError(Exception):
+    """A symbol could not be resolved into a tradable instrument"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class InstrumentService:
+    """
+    Resolves a symbol into a tradable Stock plus a live quote with as few
+    upstream calls as possible.
+
+    Known Stock rows act as the local instrument master, so they only cost
+    one (usually cached) quote. Unknown symbols fetch the profile once to
+    validate and create the Stock row.
+    """
+
+    def __init__(self, finnhub=None):
+        self.finnhub = finnhub or FinnhubService()
+
+    def resolve(self, symbol, create=True, stock=None):
+        """
+        Returns (stock, quote). Raises InstrumentResolutionError when the
+        symbol is invalid, untradable or has no live price.
+
+        Pass stock when the caller already has the row (e.g. a holding's
+        stock, which may since have been soft-deleted) to skip the lookup.
+        """
+        symbol = symbol.upper().strip()
+
+        quote = self.finnhub.get_stock_quote(symbol)
+        if not quote:
+            raise InstrumentResolutionError("Invalid stock symbol: Symbol not found or invalid")
+
+        # Never execute an order at a stale fallback price
+        if quote.get('stale'):
+            raise InstrumentResolutionError(
+                "Market data is temporarily unavailable, please try again later",
+                status_code=503,
+            )
+
+        if stock is None:
+            stock = Stock.objects.filter(symbol=symbol).first()
+        if stock is not None:
+            return stock, quote
+
+        if not create:
+            raise InstrumentResolutionError("Invalid stock symbol: Symbol not found or invalid")
+
+        return self._create_stock(symbol, quote), quote
+
+    def _create_stock(self, symbol, quote):
+        profile = self.finnhub.get_stock_profile(symbol) or {}
+
+        # Check that it's not OTC or untradable
+        if profile and profile.get('marketCapitalization', 0) == 0:
+            raise InstrumentResolutionError("Invalid stock symbol: Stock may not be actively traded")
+
+        stock, created = Stock.objects.get_or_create(
+            symbol=symbol,
+            defaults={
+                'name': profile.get('name', f"{symbol} Corporation"),
+                'current_price': quote['current_price'],
+                'currency': profile.get('currency', 'USD'),
+                'exchange': profile.get('exchange', 'NASDAQ'),
+                'sector': profile.get('finnhubIndustry', ''),
+                'market_cap': profile.get('marketCapitalization'),
+            }
+        )
+        if created:
+            logger.info(f"Added {symbol} to the instrument master")
+        return stock
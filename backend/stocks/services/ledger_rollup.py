@@ -0,0 +1,177 @@
+# stocks/services/ledger_rollup.py
+"""
+Monthly Transaction rollups.
+
+Every Transaction insert adds its amount, |amount|, fee and a count to the
+(user, month, type) row of LedgerMonthlyRollup. A date-range summary then
+reads whole months from the rollup and only scans Transaction for the
+partial months at either edge of the range.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Abs, TruncMonth
+
+from stocks.models import LedgerMonthlyRollup, Transaction
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+def month_of(value):
+    """First day of the (UTC) month containing the datetime"""
+    return value.astimezone(dt_timezone.utc).date().replace(day=1)
+
+
+def _month_start(month):
+    return datetime.combine(month, datetime.min.time(), tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def record_transaction(tx, sign=1):
+    """
+    Add (or with sign=-1 remove) one transaction to its monthly rollup.
+    Runs in the caller's transaction, so the rollup commits with the row.
+    A removal never creates a row: with no rollup there is nothing to undo.
+    """
+    amount = Decimal(tx.amount or 0) * sign
+    fee = Decimal(tx.transaction_fee or 0) * sign
+    key = {'user_id': tx.user_id, 'month': month_of(tx.created_at), 'transaction_type': tx.transaction_type}
+    changes = {
+        'total_amount': F('total_amount') + amount,
+        'total_magnitude': F('total_magnitude') + abs(amount) * sign,
+        'total_fee': F('total_fee') + fee,
+        'tx_count': F('tx_count') + sign,
+    }
+
+    if LedgerMonthlyRollup.objects.filter(**key).update(**changes) or sign < 0:
+        return
+    try:
+        # Savepoint, so a lost insert race does not break the outer transaction
+        with transaction.atomic():
+            LedgerMonthlyRollup.objects.create(
+                **key, total_amount=amount, total_magnitude=abs(amount),
+                total_fee=fee, tx_count=1,
+            )
+    except IntegrityError:
+        LedgerMonthlyRollup.objects.filter(**key).update(**changes)
+
+
+def rebuild_rollups(users=None):
+    """
+    Recompute rollups from Transaction for the given users (a queryset or
+    list of ids; default everyone). Returns the number of rows written.
+    """
+    txs = Transaction.objects.all()
+    rollups = LedgerMonthlyRollup.objects.all()
+    if users is not None:
+        txs = txs.filter(user__in=users)
+        rollups = rollups.filter(user__in=users)
+
+    grouped = (
+        txs.order_by()
+        .annotate(period=TruncMonth('created_at', tzinfo=dt_timezone.utc))
+        .values('user_id', 'period', 'transaction_type')
+        .annotate(
+            total=Sum('amount'), magnitude=Sum(Abs('amount')),
+            fees=Sum('transaction_fee'), count=Count('id'),
+        )
+    )
+
+    with transaction.atomic():
+        rollups.delete()
+        rows = [
+            LedgerMonthlyRollup(
+                user_id=row['user_id'],
+                month=month_of(row['period']),
+                transaction_type=row['transaction_type'],
+                total_amount=Decimal(row['total'] or 0).quantize(CENT),
+                total_magnitude=Decimal(row['magnitude'] or 0).quantize(CENT),
+                total_fee=Decimal(row['fees'] or 0).quantize(CENT),
+                tx_count=row['count'],
+            )
+            for row in grouped.iterator()
+        ]
+        LedgerMonthlyRollup.objects.bulk_create(rows, batch_size=1000)
+    logger.info(f"Rebuilt {len(rows)} ledger rollup rows")
+    return len(rows)
+
+
+def _add(summary, tx_type, amount, magnitude, fee, count):
+    entry = summary.setdefault(tx_type, {
+        'amount': Decimal('0'), 'magnitude': Decimal('0'), 'fee': Decimal('0'), 'count': 0,
+    })
+    # Backends without a native decimal type (SQLite) sum as floats
+    entry['amount'] += Decimal(amount or 0).quantize(CENT)
+    entry['magnitude'] += Decimal(magnitude or 0).quantize(CENT)
+    entry['fee'] += Decimal(fee or 0).quantize(CENT)
+    entry['count'] += count or 0
+
+
+def _scan(summary, txs):
+    for row in txs.order_by().values('transaction_type').annotate(
+        total=Sum('amount'), magnitude=Sum(Abs('amount')),
+        fees=Sum('transaction_fee'), count=Count('id'),
+    ):
+        _add(summary, row['transaction_type'], row['total'], row['magnitude'], row['fees'], row['count'])
+
+
+def summarize(user=None, start=None, end=None, types=None):
+    """
+    Totals per transaction type between start and end (inclusive aware
+    datetimes, either may be None) for one user or, with user=None, all.
+
+    Returns {type: {'amount', 'magnitude', 'fee', 'count'}}.
+    """
+    txs = Transaction.objects.all()
+    rollups = LedgerMonthlyRollup.objects.all()
+    if user is not None:
+        txs = txs.filter(user=user)
+        rollups = rollups.filter(user=user)
+    if types:
+        txs = txs.filter(transaction_type__in=types)
+        rollups = rollups.filter(transaction_type__in=types)
+
+    # Whole months covered by the range: [full_from, full_to)
+    full_from = None
+    if start is not None:
+        full_from = month_of(start)
+        if _month_start(full_from) != start:
+            full_from = _next_month(full_from)
+
+    full_to = None
+    if end is not None:
+        full_to = month_of(end)
+        if _month_start(_next_month(full_to)) - timedelta(microseconds=1) <= end:
+            full_to = _next_month(full_to)
+
+    summary = {}
+    if full_from is not None and full_to is not None and full_from >= full_to:
+        # The range sits inside one or two partial months: just scan it
+        _scan(summary, txs.filter(created_at__gte=start, created_at__lte=end))
+        return summary
+
+    months = rollups
+    if full_from is not None:
+        months = months.filter(month__gte=full_from)
+        if start < _month_start(full_from):
+            _scan(summary, txs.filter(created_at__gte=start, created_at__lt=_month_start(full_from)))
+    if full_to is not None:
+        months = months.filter(month__lt=full_to)
+        if end >= _month_start(full_to):
+            _scan(summary, txs.filter(created_at__gte=_month_start(full_to), created_at__lte=end))
+
+    for row in months.order_by().values('transaction_type').annotate(
+        total=Sum('total_amount'), magnitude=Sum('total_magnitude'),
+        fees=Sum('total_fee'), count=Sum('tx_count'),
+    ):
+        _add(summary, row['transaction_type'], row['total'], row['magnitude'], row['fees'], row['count'])
+
+    return summary
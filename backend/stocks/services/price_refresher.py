@@ -0,0 +1,100 @@
+# stocks/services/price_refresher.py
+import time
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from stocks.models import Stock, StockPriceHistory, UserPortfolio
+from stocks.services.finnhub_service import FinnhubService
+from stocks.services.rate_limiter import PRIORITY_BACKGROUND
+from stocks.services.snapshot_service import SnapshotService
+from stocks.utils import get_recent_symbols
+
+logger = logging.getLogger(__name__)
+
+
+class PriceRefresher:
+    """
+    Refreshes Stock.current_price from Finnhub in batches.
+
+    Quotes for a batch are fetched concurrently (the shared rate limiter
+    paces the workers) and written with one bulk_update on Stock plus one
+    bulk_create on StockPriceHistory inside a single transaction.
+    """
+
+    def __init__(self, service=None, workers=None, batch_size=50):
+        self.service = service or FinnhubService(priority=PRIORITY_BACKGROUND)
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def refresh(self, stocks):
+        """
+        Refresh the given Stock instances (any iterable).
+        Returns a summary dict with counts, elapsed seconds and throughput.
+        """
+        stocks = list(stocks)
+        summary = {'total': len(stocks), 'updated': 0, 'skipped': 0, 'failed': 0, 'updated_symbols': []}
+        started = time.monotonic()
+
+        for i in range(0, len(stocks), self.batch_size):
+            batch = stocks[i:i + self.batch_size]
+            try:
+                updated = self.refresh_batch(batch)
+            except Exception as e:
+                logger.error(f"Error refreshing prices for batch starting at {batch[0].symbol}: {e}")
+                summary['failed'] += len(batch)
+                continue
+
+            summary['updated'] += len(updated)
+            summary['skipped'] += len(batch) - len(updated)
+            summary['updated_symbols'].extend(s.symbol for s in updated)
+
+        elapsed = time.monotonic() - started
+        summary['elapsed'] = elapsed
+        summary['per_second'] = (summary['total'] / elapsed) if elapsed > 0 else 0
+        return summary
+
+    def refresh_batch(self, stocks, revalue=True):
+        """
+        Fetch and persist prices for one batch; returns the updated stocks.
+        With revalue=False the holders' snapshots are left to the refresh
+        daemon's SnapshotService.revalue_stale() (request paths).
+        """
+        quotes = self.service.get_stock_quotes([s.symbol for s in stocks], max_workers=self.workers)
+        now = timezone.now()
+
+        updated = []
+        history = []
+        for stock in stocks:
+            quote = quotes.get(stock.symbol.upper())
+            # Stale fallback quotes must never be written back as fresh prices
+            if not quote or quote.get('stale') or quote.get('current_price', 0) <= 0:
+                continue
+
+            price = Decimal(str(quote['current_price']))
+            stock.current_price = price
+            if quote.get('previous_close', 0) > 0:
+                stock.previous_close = Decimal(str(quote['previous_close']))
+            stock.last_updated = now
+            updated.append(stock)
+            history.append(StockPriceHistory(stock=stock, price=price))
+
+        if updated:
+            with transaction.atomic():
+                Stock.objects.bulk_update(updated, ['current_price', 'previous_close', 'last_updated'])
+                StockPriceHistory.objects.bulk_create(history)
+                if revalue:
+                    SnapshotService.apply_prices(updated)
+
+        return updated
+
+
+def get_priority_stocks(recent_max_age=3600):
+    """Active stocks that are held in a portfolio or were recently viewed"""
+    held = UserPortfolio.objects.filter(quantity__gt=0).values('stock_id')
+    active = Stock.objects.filter(is_active=True)
+    recent = get_recent_symbols(active.values_list('symbol', flat=True), recent_max_age)
+    return active.filter(Q(id__in=held) | Q(symbol__in=recent))
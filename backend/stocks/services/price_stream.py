@@ -0,0 +1,189 @@
+# stocks/services/price_stream.py
+import json
+import time
+import threading
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+from stocks.models import Stock, StockPriceHistory
+from stocks.services.snapshot_service import SnapshotService
+
+logger = logging.getLogger(__name__)
+
+
+class TickCoalescer:
+    """
+    Collects trade ticks in memory and aggregates them per symbol into a
+    bar (open/high/low/close/volume) until the next drain().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bars = {}
+        self.ticks = 0
+
+    def add_tick(self, symbol, price, volume=0, timestamp=None):
+        with self._lock:
+            self.ticks += 1
+            bar = self._bars.get(symbol)
+            if bar is None:
+                self._bars[symbol] = {
+                    'open': price, 'high': price, 'low': price, 'close': price,
+                    'volume': volume or 0, 'count': 1, 'timestamp': timestamp,
+                }
+                return
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            bar['volume'] += volume or 0
+            bar['count'] += 1
+            bar['timestamp'] = timestamp
+
+    def drain(self):
+        """Return {symbol: bar} collected since the last drain and reset"""
+        with self._lock:
+            bars, self._bars = self._bars, {}
+            return bars
+
+
+def parse_trade_message(raw):
+    """
+    Parse a Finnhub websocket message into (symbol, price, volume, ms timestamp)
+    tuples. Pings and other message types yield nothing.
+    """
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed stream message: {raw!r:.200}")
+        return []
+
+    if message.get('type') != 'trade':
+        return []
+
+    trades = []
+    for trade in message.get('data') or []:
+        symbol = trade.get('s')
+        price = trade.get('p')
+        if not symbol or not price or price <= 0:
+            continue
+        trades.append((symbol.upper(), price, trade.get('v', 0), trade.get('t')))
+    return trades
+
+
+def flush_bars(bars):
+    """
+    Persist one interval of bars: last price to Stock.current_price and one
+    StockPriceHistory row (the bar close) per symbol. Returns rows written.
+    """
+    if not bars:
+        return 0
+
+    now = timezone.now()
+    stocks = list(Stock.objects.filter(symbol__in=list(bars)))
+    history = []
+    for stock in stocks:
+        price = Decimal(str(bars[stock.symbol]['close']))
+        stock.current_price = price
+        stock.last_updated = now
+        history.append(StockPriceHistory(stock=stock, price=price))
+
+    with transaction.atomic():
+        Stock.objects.bulk_update(stocks, ['current_price', 'last_updated'])
+        StockPriceHistory.objects.bulk_create(history)
+        SnapshotService.apply_prices(stocks)
+    return len(stocks)
+
+
+class PriceStreamClient:
+    """
+    Subscribes to the Finnhub trades websocket for a set of symbols,
+    coalesces ticks in memory and flushes them to the database every
+    flush_interval seconds from a background thread.
+
+    The websocket URL comes from FINNHUB_WS_URL, so the client can be pointed
+    at a local fake server.
+    """
+
+    def __init__(self, symbols, url=None, flush_interval=5, reconnect_delay=5):
+        self.symbols = sorted({s.upper() for s in symbols})
+        self.url = url or settings.FINNHUB_WS_URL
+        self.flush_interval = flush_interval
+        self.reconnect_delay = reconnect_delay
+        self.coalescer = TickCoalescer()
+
+        self._stop = threading.Event()
+        self._app = None
+        self.flushed = 0
+
+    def _ws_url(self):
+        separator = '&' if '?' in self.url else '?'
+        return f"{self.url}{separator}token={settings.FINNHUB_API_KEY}"
+
+    # --- websocket callbacks ---
+    def _on_open(self, ws):
+        logger.info(f"Price stream connected, subscribing to {len(self.symbols)} symbols")
+        for symbol in self.symbols:
+            ws.send(json.dumps({'type': 'subscribe', 'symbol': symbol}))
+
+    def _on_message(self, ws, raw):
+        for symbol, price, volume, ts in parse_trade_message(raw):
+            self.coalescer.add_tick(symbol, price, volume, ts)
+
+    def _on_error(self, ws, error):
+        logger.error(f"Price stream error: {error}")
+
+    def _on_close(self, ws, status_code, message):
+        logger.warning(f"Price stream closed ({status_code}): {message}")
+
+    # --- flushing ---
+    def flush(self):
+        bars = self.coalescer.drain()
+        if not bars:
+            return 0
+        close_old_connections()
+        try:
+            written = flush_bars(bars)
+            self.flushed += written
+            return written
+        except Exception as e:
+            logger.error(f"Error flushing {len(bars)} streamed prices: {e}")
+            return 0
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    # --- lifecycle ---
+    def run(self):
+        """Run until stop() is called; reconnects automatically"""
+        import websocket  # optional dependency: websocket-client
+
+        flusher = threading.Thread(target=self._flush_loop, name='price-stream-flush', daemon=True)
+        flusher.start()
+
+        try:
+            while not self._stop.is_set():
+                self._app = websocket.WebSocketApp(
+                    self._ws_url(),
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_error=self._on_error,
+                    on_close=self._on_close,
+                )
+                self._app.run_forever(ping_interval=30, ping_timeout=10)
+                if not self._stop.is_set():
+                    time.sleep(self.reconnect_delay)
+        finally:
+            self._stop.set()
+            flusher.join(timeout=self.flush_interval + 1)
+            # Persist whatever arrived after the last interval
+            self.flush()
+
+    def stop(self):
+        self._stop.set()
+        if self._app is not None:
+            self._app.close()
@@ -0,0 +1,174 @@
+# stocks/services/quote_cache.py
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A fetch in progress that other threads can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class QuoteCache:
+    """
+    Process-wide TTL cache in front of Finnhub quotes.
+
+    Quotes are stored in the Django cache named by FINNHUB_QUOTE_CACHE_ALIAS
+    (locmem by default, a shared backend in production). A local LRU index
+    bounds how many symbols this process keeps alive, and concurrent misses
+    for the same symbol are collapsed into a single upstream fetch.
+    """
+
+    KEY_PREFIX = "finnhub:quote:"
+    LAST_KNOWN_PREFIX = "finnhub:last-quote:"
+
+    def __init__(self, alias=None, ttl=None, max_entries=None):
+        self.alias = alias or settings.FINNHUB_QUOTE_CACHE_ALIAS
+        self.ttl = ttl if ttl is not None else settings.FINNHUB_QUOTE_CACHE_TTL
+        self.max_entries = max_entries or settings.FINNHUB_QUOTE_CACHE_MAX_ENTRIES
+        # Last good quote per symbol, kept much longer than the TTL as a stale fallback
+        self.last_known_ttl = settings.FINNHUB_LAST_QUOTE_TTL
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._inflight = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def backend(self):
+        # caches[] is thread-local, so resolve it on every access
+        return caches[self.alias]
+
+    def _key(self, symbol):
+        return f"{self.KEY_PREFIX}{symbol.upper()}"
+
+    def _touch(self, key):
+        """Mark a key as recently used and evict the oldest ones over the limit"""
+        evicted = []
+        with self._lock:
+            self._lru[key] = True
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                old_key, _ = self._lru.popitem(last=False)
+                evicted.append(old_key)
+            self.evictions += len(evicted)
+
+        if evicted:
+            self.backend.delete_many(evicted)
+
+    def get(self, symbol, count=True):
+        """Return the cached quote for a symbol, or None"""
+        key = self._key(symbol)
+        quote = self.backend.get(key)
+
+        if count:
+            with self._lock:
+                if quote is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+
+        if quote is not None:
+            self._touch(key)
+        return quote
+
+    def get_many(self, symbols):
+        """Return {symbol: quote} for the symbols that are cached"""
+        keys = {self._key(symbol): symbol for symbol in symbols}
+        found = self.backend.get_many(list(keys))
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        for key in found:
+            self._touch(key)
+        return {keys[key]: quote for key, quote in found.items()}
+
+    def set(self, symbol, quote):
+        key = self._key(symbol)
+        self.backend.set(key, quote, self.ttl)
+        self._touch(key)
+
+        if not quote.get('stale'):
+            last_known = dict(quote, as_of=time.time())
+            self.backend.set(f"{self.LAST_KNOWN_PREFIX}{symbol.upper()}", last_known, self.last_known_ttl)
+
+    def get_last_known(self, symbol):
+        """Return the last good quote seen for a symbol, however old, or None"""
+        return self.backend.get(f"{self.LAST_KNOWN_PREFIX}{symbol.upper()}")
+
+    def get_or_fetch(self, symbol, fetch, counted=False):
+        """
+        Return a fresh quote for the symbol, calling fetch(symbol) on a miss.
+        counted=True when the caller already counted this lookup (a get_many
+        miss), so the re-check here does not count it a second time.
+
+        Only one thread per process fetches a given symbol at a time; the
+        others wait for its result instead of hitting the API again. A stale
+        fallback quote is returned but not cached, so the next call retries.
+        """
+        quote = self.get(symbol, count=not counted)
+        if quote is not None:
+            return quote
+
+        key = self._key(symbol)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait(settings.FINNHUB_TIMEOUT)
+            return flight.result
+
+        try:
+            quote = fetch(symbol)
+            if quote is not None and not quote.get('stale'):
+                self.set(symbol, quote)
+            flight.result = quote
+            return quote
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits / lookups) if lookups else 0,
+                'entries': len(self._lru),
+                'ttl': self.ttl,
+                'max_entries': self.max_entries,
+            }
+
+
+_quote_cache = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    """Return the process-wide QuoteCache instance"""
+    global _quote_cache
+    if _quote_cache is None:
+        with _quote_cache_lock:
+            if _quote_cache is None:
+                _quote_cache = QuoteCache()
+    return _quote_cache
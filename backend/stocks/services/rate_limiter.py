@@ -0,0 +1,162 @@
+# stocks/services/rate_limiter.py
+import time
+import threading
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+PRIORITY_TRADE = 'trade'
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+
+# Share of the bucket each priority must leave untouched. Lower priorities
+# stop spending earlier, so trade execution always finds a token left.
+RESERVES = {
+    PRIORITY_TRADE: 0.0,
+    PRIORITY_INTERACTIVE: 0.2,
+    PRIORITY_BACKGROUND: 0.5,
+}
+
+# How long a call of each priority may wait for a token (seconds)
+MAX_WAIT = {
+    PRIORITY_TRADE: 5,
+    PRIORITY_INTERACTIVE: 2,
+    PRIORITY_BACKGROUND: 60,
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no token could be acquired in time"""
+
+
+class TokenBucket:
+    """
+    Per-process token bucket: refills at `rate` tokens per second up to
+    `capacity` tokens.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, priority):
+        """Take a token if one is available above the priority's reserve.
+        Returns (acquired, seconds until the next attempt may succeed)."""
+        floor = self.capacity * RESERVES[priority]
+        with self._lock:
+            self._refill()
+            if self.tokens - 1 >= floor:
+                self.tokens -= 1
+                return True, 0
+            return False, (floor + 1 - self.tokens) / self.rate
+
+
+class SharedTokenBucket:
+    """
+    Limiter shared by every worker through the Django cache.
+
+    Uses a fixed window of capacity / rate seconds holding `capacity` calls,
+    which approximates the token bucket with cache add/incr only. incr is
+    atomic on Redis and Memcached; on DatabaseCache it is a read followed
+    by a write, so concurrent calls can lose increments and let a few more
+    calls than the limit through.
+    """
+
+    KEY_PREFIX = "finnhub:ratelimit:"
+
+    def __init__(self, rate, capacity, alias):
+        self.rate = float(rate)
+        self.capacity = int(capacity)
+        self.window = max(self.capacity / self.rate, 1.0)
+        self.alias = alias
+
+    def try_acquire(self, priority):
+        cache = caches[self.alias]
+        now = time.time()
+        window_id = int(now // self.window)
+        key = f"{self.KEY_PREFIX}{window_id}"
+        limit = self.capacity * (1 - RESERVES[priority])
+
+        cache.add(key, 0, int(self.window) + 1)
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            # Key expired between add() and incr()
+            cache.add(key, 1, int(self.window) + 1)
+            used = 1
+
+        if used <= limit:
+            return True, 0
+        return False, (window_id + 1) * self.window - now
+
+
+class RateLimiter:
+    """Blocking front-end to a token bucket, with per-priority counters"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self.granted = {p: 0 for p in RESERVES}
+        self.throttled = {p: 0 for p in RESERVES}
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Wait for a token; raises RateLimitExceeded after `timeout` seconds"""
+        if timeout is None:
+            timeout = MAX_WAIT[priority]
+        deadline = time.monotonic() + timeout
+
+        while True:
+            acquired, wait = self.bucket.try_acquire(priority)
+            if acquired:
+                with self._lock:
+                    self.granted[priority] += 1
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.throttled[priority] += 1
+                raise RateLimitExceeded(f"Finnhub rate limit reached for {priority} call")
+            time.sleep(min(max(wait, 0.01), remaining))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'shared': isinstance(self.bucket, SharedTokenBucket),
+                'rate': self.bucket.rate,
+                'capacity': self.bucket.capacity,
+                'granted': dict(self.granted),
+                'throttled': dict(self.throttled),
+            }
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide RateLimiter configured from settings"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                rate = settings.FINNHUB_RATE_LIMIT_PER_SECOND
+                capacity = settings.FINNHUB_RATE_LIMIT_BURST
+                if settings.FINNHUB_RATE_LIMIT_SHARED:
+                    bucket = SharedTokenBucket(rate, capacity, settings.FINNHUB_RATE_LIMIT_CACHE_ALIAS)
+                else:
+                    bucket = TokenBucket(rate, capacity)
+                _rate_limiter = RateLimiter(bucket)
+    return _rate_limiter
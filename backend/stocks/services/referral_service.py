@@ -2,9 +2,9 @@
 from decimal import Decimal
 from django.db import transaction
 from django.utils import timezone
-from django.db import models
 from stocks.models import UserBalance, Transaction, ReferralBonus
 from stocks.emails.services import TransactionEmailService
+from stocks.services.ledger_rollup import summarize
 import logging
 
 logger = logging.getLogger(__name__)
@@ -119,14 +119,8 @@ class ReferralService:
         """
         Get total earnings from referrals for a user
         """
-        total = Transaction.objects.filter(
-            user=user,
-            transaction_type='REFERRAL'
-        ).aggregate(
-            total=models.Sum('amount')
-        )['total']
-        
-        return total or Decimal('0')
+        totals = summarize(user, types=['REFERRAL'])
+        return totals.get('REFERRAL', {}).get('amount', Decimal('0'))
     
     def get_referral_history(self, user):
         """
@@ -0,0 +1,153 @@
+# stocks/services/report_queue.py
+import time
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction, close_old_connections
+from django.utils import timezone
+
+from stocks.models import ReportRequest
+from stocks.services.report_service import ReportService
+from stocks.emails.services import ReportEmailService
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_report():
+    """
+    Atomically move the oldest due PENDING report to GENERATING and return
+    it, or None. SKIP LOCKED lets several workers poll the same table
+    without blocking on, or double-claiming, each other's rows.
+    """
+    with transaction.atomic():
+        report = (
+            ReportRequest.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="PENDING", run_after__lte=timezone.now())
+            .order_by("run_after", "created_at")
+            .first()
+        )
+        if report is None:
+            return None
+
+        report.status = "GENERATING"
+        report.started_at = timezone.now()
+        report.attempts += 1
+        report.save(update_fields=["status", "started_at", "attempts"])
+        return report
+
+
+def requeue_stale_reports(timeout=None):
+    """Put GENERATING reports abandoned by a dead worker back in the queue"""
+    timeout = timeout if timeout is not None else settings.REPORT_JOB_TIMEOUT
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = ReportRequest.objects.filter(status="GENERATING", started_at__lt=cutoff)
+    stale.filter(attempts__gte=settings.REPORT_MAX_ATTEMPTS).update(
+        status="FAILED", finished_at=timezone.now(), error_message="Worker timed out"
+    )
+    return stale.update(status="PENDING", run_after=timezone.now(), error_message="Worker timed out")
+
+
+def process_report(report, max_attempts=None):
+    """Generate one claimed report and email it; on failure retry with backoff or mark FAILED"""
+    max_attempts = max_attempts or settings.REPORT_MAX_ATTEMPTS
+    started = time.perf_counter()
+    try:
+        ReportService.generate(report)
+    except Exception as e:
+        logger.error(f"Report {report.id} failed (attempt {report.attempts}/{max_attempts}): {e}")
+        report.error_message = str(e)
+        if report.attempts < max_attempts:
+            report.status = "PENDING"
+            report.run_after = timezone.now() + timedelta(
+                seconds=settings.REPORT_RETRY_BACKOFF * 2 ** (report.attempts - 1)
+            )
+        else:
+            report.status = "FAILED"
+            report.finished_at = timezone.now()
+        report.save(update_fields=["status", "error_message", "run_after", "finished_at"])
+        return False
+
+    logger.info(f"Report {report.id} generated in {time.perf_counter() - started:.1f}s")
+    ReportEmailService.send_report_ready_email(report.user, report)
+    return True
+
+
+class ReportWorker:
+    """
+    Runs `concurrency` threads that each claim and process reports until
+    stopped (or, with once=True, until the queue is empty). Reports stuck
+    in GENERATING are requeued at startup and then every
+    REPORT_REQUEUE_INTERVAL seconds by whichever thread polls first.
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None, max_attempts=None):
+        self.concurrency = concurrency or settings.REPORT_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval if poll_interval is not None else settings.REPORT_WORKER_POLL_INTERVAL
+        self.max_attempts = max_attempts or settings.REPORT_MAX_ATTEMPTS
+        self._stop = threading.Event()
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self._last_requeue = None
+
+    def stop(self):
+        self._stop.set()
+
+    def _requeue_if_due(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._last_requeue is not None and now - self._last_requeue < settings.REPORT_REQUEUE_INTERVAL:
+                return
+            self._last_requeue = now
+        try:
+            requeued = requeue_stale_reports()
+        except Exception as e:
+            logger.error(f"Could not requeue stale reports: {e}")
+            return
+        if requeued:
+            logger.warning(f"Requeued {requeued} stale reports")
+
+    def _loop(self, once):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                self._requeue_if_due()
+                try:
+                    report = claim_next_report()
+                except Exception as e:
+                    logger.error(f"Could not claim a report: {e}")
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                if report is None:
+                    if once:
+                        return
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                ok = process_report(report, self.max_attempts)
+                with self._lock:
+                    self.processed += 1
+                    self.failed += 0 if ok else 1
+        finally:
+            # Each thread has its own DB connection
+            connections.close_all()
+
+    def run(self, once=False):
+        self._requeue_if_due()
+
+        threads = [
+            threading.Thread(target=self._loop, args=(once,), name=f"report-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+
+        return {'processed': self.processed, 'failed': self.failed}
@@ -1,12 +1,19 @@
 import io
 import os
+import hashlib
+import time
+import logging
+import tempfile
 from datetime import timezone
 from datetime import datetime, date
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max
 from django.utils import timezone as dj_timezone
-from django.core.files.base import ContentFile
+from django.core.files import File
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
@@ -15,6 +22,11 @@ from reportlab.lib import colors
 
 from stocks.models import Transaction, UserPortfolio, ReportRequest, Stock
 from stocks.services.finnhub_service import FinnhubService
+from stocks.services.ledger_rollup import summarize
+from stocks.services.rate_limiter import PRIORITY_BACKGROUND
+from stocks.services.valuation import get_current_prices
+
+logger = logging.getLogger(__name__)
 
 
 class ReportService:
@@ -38,32 +50,37 @@ class ReportService:
         return qs.order_by('created_at')
 
     @staticmethod
-    def _compute_cash_flows(transactions):
-        total_deposits = Decimal('0')
-        total_withdrawals = Decimal('0')
-        total_buys = Decimal('0')
-        total_sells = Decimal('0')
-        total_fees = Decimal('0')
-        total_referrals = Decimal('0')
-
-        for tx in transactions:
-            try:
-                amt = Decimal(str(tx.amount))
-            except (InvalidOperation, TypeError):
-                amt = Decimal('0')
-
-            total_fees += Decimal(str(tx.transaction_fee or 0))
-
-            if tx.transaction_type == 'DEPOSIT':
-                total_deposits += amt
-            elif tx.transaction_type == 'WITHDRAWAL':
-                total_withdrawals += -amt if amt < 0 else amt
-            elif tx.transaction_type == 'BUY':
-                total_buys += -amt if amt < 0 else amt
-            elif tx.transaction_type == 'SELL':
-                total_sells += amt
-            elif tx.transaction_type == 'REFERRAL':
-                total_referrals += amt
+    def _iter_tx_rows(tx_qs, chunk_size=2000):
+        """Transaction rows for the report, fetched lazily in chunks"""
+        for tx in tx_qs.iterator(chunk_size=chunk_size):
+            yield {
+                "date": tx.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "type": tx.transaction_type,
+                "symbol": tx.stock.symbol if tx.stock else None,
+                "quantity": tx.quantity,
+                "price": float(tx.price) if tx.price else None,
+                "amount": float(tx.amount),
+                "fee": float(tx.transaction_fee),
+            }
+
+    @staticmethod
+    def _compute_cash_flows(user, date_from=None, date_to=None):
+        """
+        Cash-flow totals for the user's transactions in the range, read from
+        the monthly ledger rollups plus the partial months at either end.
+        """
+        totals = summarize(user, date_from, date_to)
+
+        def total(tx_type, key='amount'):
+            return (totals.get(tx_type) or {}).get(key, Decimal('0'))
+
+        total_deposits = total('DEPOSIT')
+        # Withdrawals and buys are stored negative; the summary reports magnitudes
+        total_withdrawals = total('WITHDRAWAL', 'magnitude')
+        total_buys = total('BUY', 'magnitude')
+        total_sells = total('SELL')
+        total_referrals = total('REFERRAL')
+        total_fees = sum((row['fee'] for row in totals.values()), Decimal('0'))
 
         net_cash_flow = total_deposits + total_referrals + total_sells - total_withdrawals - total_buys - total_fees
 
@@ -79,16 +96,16 @@ class ReportService:
 
     @staticmethod
     def _compute_current_valuation(user):
-        service = FinnhubService()
-        items = UserPortfolio.objects.filter(user=user).select_related('stock')
+        service = FinnhubService(priority=PRIORITY_BACKGROUND)
+        items = list(UserPortfolio.objects.filter(user=user).select_related('stock'))
+        prices = get_current_prices([item.stock for item in items], service=service)
         rows = []
         total_value = Decimal('0')
         total_cost = Decimal('0')
 
         for item in items:
             symbol = item.stock.symbol
-            quote = service.get_stock_quote(symbol) or {}
-            current_price = Decimal(str(quote.get('current_price', item.stock.current_price or 0)))
+            current_price = prices[symbol]['price']
             current_value = current_price * Decimal(item.quantity)
             invested_value = Decimal(item.quantity) * Decimal(item.average_price)
             profit = current_value - invested_value
@@ -117,10 +134,18 @@ class ReportService:
             'total_profit_pct': pct,
         }
 
+    @classmethod
+    def _compute_current_valuation_in_worker(cls, user):
+        try:
+            return cls._compute_current_valuation(user)
+        finally:
+            # Worker threads open their own DB connections; don't leak them
+            connections.close_all()
+
     @staticmethod
-    def _write_pdf(user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to):
-        buf = io.BytesIO()
-        c = canvas.Canvas(buf, pagesize=A4)
+    def _write_pdf(out, user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to):
+        """Render the PDF into the binary file object `out`; returns the page count"""
+        c = canvas.Canvas(out, pagesize=A4, pageCompression=1)
         width, height = A4
 
         def hline(y):
@@ -244,15 +269,16 @@ class ReportService:
             c.drawRightString(xcols[6], y, f"${row['fee']:,.2f}")
             y -= 0.3 * cm
 
+        pages = c.getPageNumber()
         c.showPage()
         c.save()
-        buf.seek(0)
-        return ContentFile(buf.read())
+        return pages
 
     @staticmethod
-    def _write_csv(user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to):
+    def _write_csv(out, user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to):
+        """Write the CSV into the binary file object `out`; returns the row count"""
         import csv
-        buf = io.StringIO()
+        buf = io.TextIOWrapper(out, encoding="utf-8", newline="")
         w = csv.writer(buf)
 
         dr = date_from.date().isoformat() if date_from else "beginning"
@@ -302,6 +328,7 @@ class ReportService:
         w.writerow(["Transaction History"])
         w.writerow(["Date", "Type", "Symbol", "Qty", "Price", "Amount", "Fee"])
 
+        rows = 0
         for row in tx_rows:
             w.writerow([
                 row['date'],
@@ -312,9 +339,65 @@ class ReportService:
                 f"{row['amount']:.2f}",
                 f"{row['fee']:.2f}",
             ])
+            rows += 1
 
-        data = buf.getvalue().encode("utf-8")
-        return ContentFile(data)
+        # Hand the underlying file back to the caller open
+        buf.flush()
+        buf.detach()
+        return rows
+
+    @classmethod
+    def fingerprint(cls, report_request: ReportRequest):
+        """
+        sha256 of everything the report content depends on: the request
+        parameters, the state of the user's ledger in the range and, with
+        valuation, the current holdings (quantity and average cost, which
+        trades after date_to also change) and when their prices were last
+        refreshed.
+        """
+        user = report_request.user
+        date_from, date_to = cls._parse_range(report_request.date_from, report_request.date_to)
+        ledger = cls._query_transactions(user, date_from, date_to).order_by().aggregate(
+            last_id=Max('id'), last_updated=Max('updated_at'), count=Count('id')
+        )
+
+        holdings = None
+        if report_request.include_current_valuation:
+            holdings = [
+                (symbol, quantity, str(average_price), last_updated.isoformat() if last_updated else None)
+                for symbol, quantity, average_price, last_updated in
+                UserPortfolio.objects.filter(user=user).order_by('stock_id').values_list(
+                    'stock__symbol', 'quantity', 'average_price', 'stock__last_updated'
+                )
+            ]
+
+        parts = [
+            user.pk,
+            report_request.date_from,
+            report_request.date_to,
+            report_request.format,
+            report_request.include_current_valuation,
+            ledger['last_id'],
+            ledger['last_updated'].isoformat() if ledger['last_updated'] else None,
+            ledger['count'],
+            holdings,
+        ]
+        return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _find_cached(report_request: ReportRequest, fingerprint):
+        """A COMPLETED report with the same fingerprint whose file still exists, or None"""
+        candidates = (
+            ReportRequest.objects
+            .filter(fingerprint=fingerprint, status="COMPLETED")
+            .exclude(pk=report_request.pk)
+            .exclude(file="")
+            .order_by("-finished_at")
+        )
+        for candidate in candidates[:3]:
+            if candidate.file and candidate.file.storage.exists(candidate.file.name):
+                return candidate
+        return None
 
     @classmethod
     def generate(cls, report_request: ReportRequest):
@@ -322,40 +405,57 @@ class ReportService:
         report_request.started_at = dj_timezone.now()
         report_request.save(update_fields=["status", "started_at"])
 
+        # Nothing changed since an identical report was built: reuse its file
+        report_request.fingerprint = cls.fingerprint(report_request)
+        cached = cls._find_cached(report_request, report_request.fingerprint)
+        if cached is not None:
+            report_request.file.name = cached.file.name
+            report_request.status = "COMPLETED"
+            report_request.finished_at = dj_timezone.now()
+            report_request.save(update_fields=["file", "fingerprint", "status", "finished_at"])
+            logger.info(f"Report {report_request.id}: reused file of report {cached.id}")
+            return report_request
+
         user = report_request.user
         date_from, date_to = cls._parse_range(report_request.date_from, report_request.date_to)
         tx_qs = cls._query_transactions(user, date_from, date_to)
 
-        tx_rows = []
-        for tx in tx_qs:
-            tx_rows.append({
-                "date": tx.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "type": tx.transaction_type,
-                "symbol": tx.stock.symbol if tx.stock else None,
-                "quantity": tx.quantity,
-                "price": float(tx.price) if tx.price else None,
-                "amount": float(tx.amount),
-                "fee": float(tx.transaction_fee),
-            })
-
-        cash_summary = cls._compute_cash_flows(tx_qs)
+        tx_rows = cls._iter_tx_rows(tx_qs)
 
         valuation_rows = None
         valuation_summary = None
 
         if report_request.include_current_valuation:
-            valuation_rows, valuation_summary = cls._compute_current_valuation(user)
-
-        if report_request.format == "PDF":
-            content = cls._write_pdf(user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to)
-            filename = f"report_{report_request.id}.pdf"
+            # Valuation waits mostly on quote fetches; overlap it with the cash-flow query
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                valuation = pool.submit(cls._compute_current_valuation_in_worker, user)
+                cash_summary = cls._compute_cash_flows(user, date_from, date_to)
+                valuation_rows, valuation_summary = valuation.result()
         else:
-            content = cls._write_csv(user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to)
-            filename = f"report_{report_request.id}.csv"
+            cash_summary = cls._compute_cash_flows(user, date_from, date_to)
+
+        # Render to a temporary file and hand that to the storage, so the
+        # document is never held in memory as a bytes copy
+        suffix = ".pdf" if report_request.format == "PDF" else ".csv"
+        started = time.perf_counter()
+        with tempfile.NamedTemporaryFile(suffix=suffix, dir=settings.FILE_UPLOAD_TEMP_DIR) as tmp:
+            if report_request.format == "PDF":
+                pages = cls._write_pdf(tmp, user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to)
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Report {report_request.id}: rendered {pages} pages in {elapsed:.2f}s "
+                    f"({pages / elapsed if elapsed else 0:.1f} pages/s)"
+                )
+            else:
+                rows = cls._write_csv(tmp, user, tx_rows, cash_summary, valuation_rows, valuation_summary, date_from, date_to)
+                elapsed = time.perf_counter() - started
+                logger.info(f"Report {report_request.id}: wrote {rows} rows in {elapsed:.2f}s")
+
+            tmp.seek(0)
+            report_request.file.save(f"report_{report_request.id}{suffix}", File(tmp), save=False)
 
-        report_request.file.save(filename, content, save=True)
         report_request.status = "COMPLETED"
         report_request.finished_at = dj_timezone.now()
-        report_request.save(update_fields=["file", "status", "finished_at"])
+        report_request.save(update_fields=["file", "fingerprint", "status", "finished_at"])
 
         return report_request
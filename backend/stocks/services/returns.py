@@ -0,0 +1,185 @@
+# stocks/services/returns.py
+"""
+Time-weighted (TWR) and money-weighted (XIRR) returns from the ledger.
+
+The account is cash plus holdings: every Transaction moves cash, BUY/SELL
+move shares, and DEPOSIT/WITHDRAWAL/REFERRAL are external flows. The
+ledger is streamed once in created_at order in fixed-size chunks, so
+memory is bounded by (days x stocks) rather than by the number of rows.
+"""
+from datetime import date, timedelta
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from stocks.models import Transaction
+from stocks.services.analytics import business_days, day_index, day_start, load_price_matrix
+
+logger = logging.getLogger(__name__)
+
+EXTERNAL_FLOWS = ('DEPOSIT', 'WITHDRAWAL', 'REFERRAL')
+CHUNK_SIZE = 2000
+
+
+def _cache():
+    return caches[settings.RETURNS_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f"returns:version:{user_id}"
+
+
+def get_returns_version(user_id):
+    # Timestamps, never reused: a version recreated after an eviction
+    # cannot match results cached under an older one
+    return _cache().get_or_set(_version_key(user_id), time.time_ns, None)
+
+
+def invalidate_returns(user_id):
+    """Drop every cached result for the user by moving to a new version"""
+    _cache().set(_version_key(user_id), time.time_ns(), None)
+
+
+def xirr(amounts, years, guesses=(-0.5, -0.1, 0.0, 0.1, 0.5, 1.0, 3.0), iterations=50, tolerance=1e-7):
+    """
+    Annual rate r with sum(amounts / (1 + r) ** years) == 0.
+
+    Newton's method runs from every guess at once as one array operation;
+    of the guesses that converge, the root closest to zero is returned.
+    None when there is no sign change or nothing converges.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.asarray(years, dtype=float)
+    if not (amounts > 0).any() or not (amounts < 0).any():
+        return None
+
+    rates = np.array(guesses, dtype=float)
+    scale = np.abs(amounts).sum()
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            base = 1 + rates[:, None]
+            discounted = amounts * base ** -years
+            npv = discounted.sum(axis=1)
+            slope = (-years * discounted / base).sum(axis=1)
+            rates = np.maximum(rates - npv / slope, -0.9999)
+
+        base = 1 + rates[:, None]
+        npv = (amounts * base ** -years).sum(axis=1)
+
+    converged = np.isfinite(rates) & (np.abs(npv) < tolerance * scale)
+    if not converged.any():
+        return None
+    roots = rates[converged]
+    return float(roots[np.argmin(np.abs(roots))])
+
+
+def _iter_ledger(ledger, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of (type, stock_id, quantity, amount, created_at) in
+    created_at, id order, chunk_size rows at a time. Pages are fetched with
+    keyset pagination (as transaction_export.iter_transaction_rows does):
+    iterator() on mysqlclient would still buffer the whole ledger.
+    """
+    ledger = ledger.order_by('created_at', 'id').values_list(
+        'transaction_type', 'stock_id', 'quantity', 'amount', 'created_at', 'id'
+    )
+    page = ledger
+    while True:
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield [row[:5] for row in rows]
+        last_created, last_id = rows[-1][4], rows[-1][5]
+        page = ledger.filter(Q(created_at__gt=last_created) | Q(created_at=last_created, id__gt=last_id))
+
+
+def compute_returns(user, date_from, date_to):
+    days = business_days(date_from, date_to)
+    if len(days) < 2:
+        raise ValueError("Date range must span at least two business days")
+    n_days = len(days)
+    end = day_start(days[-1] + 1)
+
+    ledger = Transaction.objects.filter(user=user, created_at__lt=end)
+    stock_ids = sorted(
+        ledger.filter(transaction_type__in=['BUY', 'SELL'], stock__isnull=False)
+        .values_list('stock_id', flat=True).distinct()
+    )
+    column = {stock_id: i for i, stock_id in enumerate(stock_ids)}
+    prices = load_price_matrix(stock_ids, days)
+
+    share_deltas = np.zeros((n_days, len(stock_ids)))
+    cash_deltas = np.zeros(n_days)
+    flows = np.zeros(n_days)
+
+    for chunk in _iter_ledger(ledger):
+        types, ids, quantities, amounts, created = zip(*chunk)
+        types = np.asarray(types)
+        amounts = np.asarray(amounts, dtype=float)
+        dates = np.asarray([timezone.localtime(c).date() for c in created], dtype='datetime64[D]')
+        # Everything before the range is part of the opening position on day 0
+        idx = np.clip(day_index(days, dates), 0, None)
+
+        np.add.at(cash_deltas, idx, amounts)
+
+        trades = np.isin(types, ['BUY', 'SELL']) & np.array([i is not None for i in ids])
+        if trades.any():
+            cols = np.fromiter((column[i] for i in np.asarray(ids, dtype=object)[trades]), dtype=np.int64)
+            signed = np.where(types[trades] == 'BUY', 1.0, -1.0) * np.asarray(quantities, dtype=float)[trades]
+            np.add.at(share_deltas, (idx[trades], cols), signed)
+
+        external = np.isin(types, EXTERNAL_FLOWS) & (idx > 0)
+        np.add.at(flows, idx[external], amounts[external])
+
+    cash = np.cumsum(cash_deltas)
+    shares = np.cumsum(share_deltas, axis=0)
+    values = cash + (shares * prices).sum(axis=1)
+
+    # Flows are treated as arriving at the start of their day
+    opening = values[:-1] + flows[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = np.where(opening > 0, values[1:] / opening - 1, 0.0)
+    twr = float(np.prod(1 + daily) - 1)
+
+    elapsed = (days - days[0]).astype(float) / 365.0
+    amounts = -flows
+    amounts[0] -= values[0]
+    amounts[-1] += values[-1]
+    used = amounts != 0
+    irr = xirr(amounts[used], elapsed[used])
+
+    span = elapsed[-1]
+    return {
+        'date_from': days[0].item(),
+        'date_to': days[-1].item(),
+        'start_value': float(values[0]),
+        'end_value': float(values[-1]),
+        'net_flows': float(flows[1:].sum()),
+        'twr': twr,
+        'twr_annualized': float((1 + twr) ** (1 / span) - 1) if span >= 1 and twr > -1 else None,
+        'irr': irr,
+    }
+
+
+def get_portfolio_returns(user, date_from=None, date_to=None):
+    """
+    TWR and XIRR for the user between date_from and date_to (default: the
+    last ANALYTICS_DEFAULT_DAYS days), cached per (user, range) until the
+    user's next transaction or RETURNS_CACHE_TTL.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=settings.ANALYTICS_DEFAULT_DAYS)
+
+    version = get_returns_version(user.pk)
+    key = f"returns:{user.pk}:v{version}:{date_from.isoformat()}:{date_to.isoformat()}"
+    cache = _cache()
+    result = cache.get(key)
+    if result is None:
+        result = compute_returns(user, date_from, date_to)
+        cache.set(key, result, settings.RETURNS_CACHE_TTL)
+    return result
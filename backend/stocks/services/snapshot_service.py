@@ -0,0 +1,234 @@
+# stocks/services/snapshot_service.py
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+import logging
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from stocks.models import (
+    HoldingSnapshot, PortfolioSnapshot, Stock, Transaction, UserPortfolio
+)
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+# Rows per bulk update of holdings / users per grouped totals UPDATE
+TOTALS_BATCH_SIZE = 500
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class SnapshotService:
+    """
+    Keeps PortfolioSnapshot / HoldingSnapshot in step with UserPortfolio and
+    Stock prices. Trades and price refreshes apply deltas, so reads are a
+    single-row lookup; rebuild_user() recomputes everything from Transaction.
+    """
+
+    @staticmethod
+    def _apply_totals(user_id, d_invested, d_value, d_positions):
+        PortfolioSnapshot.objects.get_or_create(user_id=user_id)
+        PortfolioSnapshot.objects.filter(user_id=user_id).update(
+            invested_value=F('invested_value') + d_invested,
+            current_value=F('current_value') + d_value,
+            positions=F('positions') + d_positions,
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def apply_holding(cls, portfolio_item):
+        """
+        Sync the snapshot of one holding after a trade changed it.
+        Must run inside the trade's transaction.
+        """
+        _, created = PortfolioSnapshot.objects.get_or_create(user_id=portfolio_item.user_id)
+        if created:
+            # First trade since snapshots existed for this user: take every
+            # holding (this one already updated), not just the traded one
+            cls.seed_from_portfolio(portfolio_item.user_id)
+            return
+
+        quantity = portfolio_item.quantity
+        average_price = _money(portfolio_item.average_price)
+        current_price = _money(portfolio_item.stock.current_price)
+
+        holding, _ = HoldingSnapshot.objects.select_for_update().get_or_create(
+            user_id=portfolio_item.user_id,
+            stock_id=portfolio_item.stock_id,
+        )
+
+        invested_value = _money(quantity * average_price)
+        current_value = _money(quantity * current_price)
+        d_invested = invested_value - holding.invested_value
+        d_value = current_value - holding.current_value
+        d_positions = (1 if quantity > 0 else 0) - (1 if holding.quantity > 0 else 0)
+
+        holding.quantity = quantity
+        holding.average_price = average_price
+        holding.current_price = current_price
+        holding.invested_value = invested_value
+        holding.current_value = current_value
+        holding.save()
+
+        cls._apply_totals(portfolio_item.user_id, d_invested, d_value, d_positions)
+
+    @classmethod
+    def apply_prices(cls, stocks):
+        """
+        Revalue every holding of the given stocks at their new current_price
+        and push the per-user differences into the portfolio totals: one
+        bulk update of the holdings and one grouped UPDATE of the totals.
+        """
+        prices = {stock.id: _money(stock.current_price) for stock in stocks}
+        if not prices:
+            return 0
+
+        with transaction.atomic():
+            # pk order, so concurrent refreshers lock rows in the same order
+            holdings = list(
+                HoldingSnapshot.objects.select_for_update()
+                .filter(stock_id__in=list(prices), quantity__gt=0).order_by('pk')
+            )
+            deltas = defaultdict(Decimal)
+            now = timezone.now()
+
+            for holding in holdings:
+                new_value = _money(holding.quantity * prices[holding.stock_id])
+                deltas[holding.user_id] += new_value - holding.current_value
+                holding.current_price = prices[holding.stock_id]
+                holding.current_value = new_value
+                holding.updated_at = now
+
+            HoldingSnapshot.objects.bulk_update(
+                holdings, ['current_price', 'current_value', 'updated_at'], batch_size=TOTALS_BATCH_SIZE
+            )
+            cls._apply_value_deltas({user_id: d for user_id, d in deltas.items() if d}, now)
+
+        return len(holdings)
+
+    @staticmethod
+    def _apply_value_deltas(deltas, now):
+        """Add {user_id: delta} to PortfolioSnapshot.current_value, one UPDATE per chunk of users"""
+        user_ids = sorted(deltas)
+        for i in range(0, len(user_ids), TOTALS_BATCH_SIZE):
+            chunk = user_ids[i:i + TOTALS_BATCH_SIZE]
+            PortfolioSnapshot.objects.filter(user_id__in=chunk).update(
+                current_value=F('current_value') + Case(
+                    *[When(user_id=user_id, then=Value(deltas[user_id])) for user_id in chunk],
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                ),
+                updated_at=now,
+            )
+
+    @classmethod
+    def revalue_stale(cls):
+        """
+        apply_prices() for every stock whose price changed without it
+        (written on a request path, e.g. a trade or a portfolio view).
+        Meant for the refresh daemon. Returns the holdings revalued.
+        """
+        stock_ids = (
+            HoldingSnapshot.objects.filter(quantity__gt=0)
+            .exclude(current_price=F('stock__current_price'))
+            .order_by().values_list('stock_id', flat=True).distinct()
+        )
+        stocks = Stock.all_objects.filter(id__in=list(stock_ids)).only('id', 'current_price')
+        return cls.apply_prices(stocks)
+
+    @staticmethod
+    def replay_holdings(user):
+        """
+        Recompute {stock_id: (quantity, average_price)} from the user's BUY and
+        SELL transactions, using the same average-cost rules as buy_stock.
+        """
+        holdings = {}
+        txs = Transaction.objects.filter(
+            user=user, transaction_type__in=['BUY', 'SELL'], stock__isnull=False
+        ).order_by('created_at', 'id').values_list('transaction_type', 'stock_id', 'quantity', 'price')
+
+        for tx_type, stock_id, quantity, price in txs.iterator(chunk_size=2000):
+            held, average = holdings.get(stock_id, (0, Decimal('0')))
+            if tx_type == 'BUY':
+                total = held + quantity
+                average = _money((held * average + price * quantity) / total) if total else Decimal('0')
+                held = total
+            else:
+                held = max(held - quantity, 0)
+            holdings[stock_id] = (held, average)
+
+        return holdings
+
+    @staticmethod
+    def _write_snapshots(user_id, holdings, prices):
+        """Replace the user's snapshots with {stock_id: (quantity, average_price)} at the given prices"""
+        with transaction.atomic():
+            HoldingSnapshot.objects.filter(user_id=user_id).delete()
+            snapshots = []
+            invested_total = Decimal('0')
+            value_total = Decimal('0')
+            positions = 0
+
+            for stock_id, (quantity, average) in holdings.items():
+                price = _money(prices.get(stock_id))
+                invested = _money(quantity * average)
+                value = _money(quantity * price)
+                snapshots.append(HoldingSnapshot(
+                    user_id=user_id, stock_id=stock_id, quantity=quantity, average_price=average,
+                    current_price=price, invested_value=invested, current_value=value,
+                ))
+                invested_total += invested
+                value_total += value
+                positions += 1 if quantity > 0 else 0
+
+            HoldingSnapshot.objects.bulk_create(snapshots)
+            PortfolioSnapshot.objects.update_or_create(
+                user_id=user_id,
+                defaults={'invested_value': invested_total, 'current_value': value_total, 'positions': positions},
+            )
+
+    @classmethod
+    def seed_from_portfolio(cls, user_id):
+        """Write the user's snapshots from their current UserPortfolio rows"""
+        holdings = {}
+        prices = {}
+        for stock_id, quantity, average, price in UserPortfolio.objects.filter(user_id=user_id).values_list(
+            'stock_id', 'quantity', 'average_price', 'stock__current_price'
+        ):
+            holdings[stock_id] = (quantity, _money(average))
+            prices[stock_id] = price
+        cls._write_snapshots(user_id, holdings, prices)
+
+    @classmethod
+    def rebuild_user(cls, user):
+        """
+        Rewrite the user's snapshots from the transaction ledger.
+        Returns a list of mismatches found against UserPortfolio.
+        """
+        replayed = cls.replay_holdings(user)
+        portfolio = {
+            item.stock_id: item
+            for item in UserPortfolio.objects.filter(user=user)
+        }
+
+        mismatches = []
+        for stock_id in set(replayed) | set(portfolio):
+            quantity, average = replayed.get(stock_id, (0, Decimal('0')))
+            item = portfolio.get(stock_id)
+            held = item.quantity if item else 0
+            if held != quantity or (quantity and item and abs(_money(item.average_price) - average) > CENT):
+                mismatches.append({
+                    'stock_id': stock_id,
+                    'ledger_quantity': quantity,
+                    'ledger_average_price': average,
+                    'portfolio_quantity': held,
+                    'portfolio_average_price': _money(item.average_price) if item else None,
+                })
+
+        prices = dict(Stock.all_objects.filter(id__in=list(replayed)).values_list('id', 'current_price'))
+        cls._write_snapshots(user.pk, replayed, prices)
+
+        return mismatches
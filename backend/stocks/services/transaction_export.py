@@ -0,0 +1,92 @@
+# stocks/services/transaction_export.py
+import csv
+import io
+import json
+import zlib
+
+
+CHUNK_SIZE = 5000
+
+COLUMNS = [
+    'id', 'user', 'created_at', 'type', 'symbol', 'quantity',
+    'price', 'amount', 'fee', 'transfer_reference',
+]
+
+FIELDS = [
+    'id', 'user__username', 'created_at', 'transaction_type', 'stock__symbol', 'quantity',
+    'price', 'amount', 'transaction_fee', 'transfer_reference',
+]
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+
+
+def iter_transaction_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of value tuples (see FIELDS), chunk_size rows at a time.
+
+    Pages are fetched with keyset pagination on id rather than a single
+    iterator() cursor: mysqlclient has no server-side cursors, so
+    iterator() there still buffers the whole result set in the worker.
+    """
+    last_id = 0
+    queryset = queryset.order_by('id').values_list(*FIELDS)
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([
+                row[0], row[1], row[2].isoformat(), row[3], row[4] or '', row[5],
+                row[6], row[7], row[8], row[9] or '',
+            ])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _ndjson_chunks(chunks):
+    for rows in chunks:
+        yield ''.join(
+            json.dumps({
+                'id': row[0],
+                'user': row[1],
+                'created_at': row[2].isoformat(),
+                'type': row[3],
+                'symbol': row[4],
+                'quantity': row[5],
+                'price': str(row[6]),
+                'amount': str(row[7]),
+                'fee': str(row[8]),
+                'transfer_reference': row[9],
+            }) + '\n'
+            for row in rows
+        )
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_transactions(queryset, fmt=FORMAT_CSV, gzip=False, chunk_size=CHUNK_SIZE):
+    """Encoded export of the queryset as an iterator of bytes, for StreamingHttpResponse"""
+    chunks = iter_transaction_rows(queryset, chunk_size)
+    text = _ndjson_chunks(chunks) if fmt == FORMAT_NDJSON else _csv_chunks(chunks)
+    data = (part.encode('utf-8') for part in text)
+    return _gzip(data) if gzip else data
@@ -0,0 +1,57 @@
+# stocks/services/valuation.py
+from datetime import timedelta
+from decimal import Decimal
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from stocks.services.finnhub_service import FinnhubService
+from stocks.services.price_refresher import PriceRefresher
+
+logger = logging.getLogger(__name__)
+
+
+def get_current_prices(stocks, max_staleness=None, service=None):
+    """
+    Current price and daily change for each Stock, taken from
+    Stock.current_price and Stock.previous_close (kept fresh by the price
+    refresher, so every process sees the same values).
+
+    Only stocks whose price is older than max_staleness seconds are fetched
+    live, in one batch, and written back. Returns
+    {symbol: {'price', 'change', 'percent_change', 'stale', 'as_of'}}.
+    """
+    if max_staleness is None:
+        max_staleness = settings.PORTFOLIO_MAX_STALENESS
+
+    stocks = list({stock.symbol: stock for stock in stocks}.values())
+    cutoff = timezone.now() - timedelta(seconds=max_staleness)
+
+    outdated = [s for s in stocks if not s.last_updated or s.last_updated < cutoff or not s.current_price]
+    refreshed = set()
+    if outdated:
+        refresher = PriceRefresher(service=service or FinnhubService())
+        try:
+            # Snapshots are revalued by the refresh daemon, not on this request
+            refreshed = {s.symbol for s in refresher.refresh_batch(outdated, revalue=False)}
+        except Exception as e:
+            logger.error(f"Error refreshing {len(outdated)} outdated prices: {e}")
+
+    outdated_symbols = {s.symbol for s in outdated} - refreshed
+
+    prices = {}
+    for stock in stocks:
+        price = Decimal(stock.current_price or 0)
+        change = percent_change = 0
+        if stock.previous_close and price:
+            change = float(price - stock.previous_close)
+            percent_change = round(change / float(stock.previous_close) * 100, 4)
+        prices[stock.symbol] = {
+            'price': price,
+            'change': round(change, 2),
+            'percent_change': percent_change,
+            'stale': stock.symbol in outdated_symbols,
+            'as_of': stock.last_updated,
+        }
+    return prices
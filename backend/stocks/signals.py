@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.db.models import QuerySet
+from django.dispatch import receiver
+from user_try.models import User
+from .models import Transaction
+from .services.ledger_rollup import record_transaction
+from .services.returns import invalidate_returns
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_cached_returns(sender, instance, **kwargs):
+    invalidate_returns(instance.user_id)
+
+@receiver(post_save, sender=Transaction)
+def add_to_ledger_rollup(sender, instance, created, **kwargs):
+    # Transactions are append-only; only inserts change the totals
+    if created:
+        record_transaction(instance)
+
+@receiver(post_delete, sender=Transaction)
+def remove_from_ledger_rollup(sender, instance, origin=None, **kwargs):
+    # Deleting a user cascades to its rollups as well; nothing to adjust
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is User:
+        return
+    record_transaction(instance, sign=-1)
@@ -1,3 +1,54 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.test import TransactionTestCase
+
+from stocks.models import Stock, StockPriceHistory
+from stocks.services.finnhub_ws_standin import WsStandinServer
+from stocks.services.price_stream import PriceStreamClient
+
+
+class PriceStreamIngestionTests(TransactionTestCase):
+    """PriceStreamClient against the local trades websocket stand-in"""
+
+    def setUp(self):
+        self.server = WsStandinServer(('127.0.0.1', 0), interval_ms=50, ping_every=3)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"ws://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _stream(self, client, until, timeout=10):
+        runner = threading.Thread(target=client.run, daemon=True)
+        runner.start()
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        client.stop()
+        runner.join(timeout=timeout)
+        self.assertFalse(runner.is_alive())
+
+    def test_streamed_trades_are_written(self):
+        aapl = Stock.objects.create(symbol='AAPL', name='Apple')
+        Stock.objects.create(symbol='MSFT', name='Microsoft')
+
+        client = PriceStreamClient(['aapl'], url=self.url, flush_interval=0.2)
+        self._stream(client, lambda: client.flushed >= 2)
+
+        self.assertEqual(self.server.counters['subscriptions'], 1)
+        self.assertGreaterEqual(StockPriceHistory.objects.filter(stock=aapl).count(), 2)
+        self.assertFalse(StockPriceHistory.objects.filter(stock__symbol='MSFT').exists())
+        aapl.refresh_from_db()
+        self.assertGreater(aapl.current_price, 0)
+
+    def test_client_reconnects_after_a_drop(self):
+        Stock.objects.create(symbol='AAPL', name='Apple')
+        self.server.drop_after = 0.2
+
+        client = PriceStreamClient(['AAPL'], url=self.url, flush_interval=0.2, reconnect_delay=0.1)
+        self._stream(client, lambda: self.server.counters['connections'] >= 2 and client.flushed)
+
+        self.assertGreaterEqual(self.server.counters['dropped'], 1)
+        self.assertGreater(StockPriceHistory.objects.count(), 0)
@@ -9,6 +9,9 @@ urlpatterns = [
     path('search/', views.search_stocks, name='stock-search'),
     path('news/', views.get_market_news, name='market-news'),
     path('portfolio/', views.get_user_portfolio, name='user-portfolio'),
+    path('portfolio/summary/', views.get_portfolio_summary, name='portfolio-summary'),
+    path('portfolio/analytics/', views.get_portfolio_analytics_view, name='portfolio-analytics'),
+    path('portfolio/returns/', views.get_portfolio_returns_view, name='portfolio-returns'),
     path('market-status/', views.check_market_status, name='market-status'),
     path('sectors/', views.get_available_sectors, name='available-sectors'),
 
@@ -18,11 +21,13 @@ urlpatterns = [
     path('transactions/buy/', views_transactions.buy_stock, name='buy-stock'),
     path('transactions/sell/', views_transactions.sell_stock, name='sell-stock'),
     path('transactions/history/', views_transactions.get_transaction_history, name='transaction-history'),
+    path('transactions/export/', views_transactions.export_transactions, name='transaction-export'),
     path('balance/', views_transactions.get_user_balance, name='user-balance'),
 
      # Reports
     path('reports/request/', views_reports.request_report, name='request-report'),
     path('reports/history/', views_reports.report_history, name='report-history'),
+    path('reports/<uuid:report_id>/status/', views_reports.report_status, name='report-status'),
 
 
     # Dynamic routes with parameters
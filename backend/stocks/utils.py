@@ -1,8 +1,10 @@
 # stocks/utils.py
 from datetime import datetime, time
+import time as time_module
 import pytz
 import requests
 from django.conf import settings
+from django.core.cache import caches
 import logging
 
 logger = logging.getLogger(__name__)
@@ -83,4 +85,39 @@ def validate_trading_hours():
         return False, "Market is closed for holiday"
     
     # Check regular market hours
-    return is_market_open()
\ No newline at end of file
+    return is_market_open()
+
+
+INTEREST_KEY_PREFIX = 'stocks:interest:'
+
+
+def _interest_cache():
+    return caches[settings.SYMBOL_INTEREST_CACHE_ALIAS]
+
+
+def mark_symbol_interest(symbol):
+    """
+    Remember that a user just opened a symbol, so the price refresher can
+    prioritise it. One key per symbol, expiring after SYMBOL_INTEREST_TTL,
+    in a cache shared with the refresh daemon: marking is a single write,
+    with no read-modify-write for concurrent requests to race.
+    """
+    try:
+        _interest_cache().set(
+            f"{INTEREST_KEY_PREFIX}{symbol.upper()}", time_module.time(), settings.SYMBOL_INTEREST_TTL
+        )
+    except Exception as e:
+        logger.error(f"Error recording interest in {symbol}: {e}")
+
+
+def get_recent_symbols(symbols, max_age=3600, batch_size=500):
+    """Those of the given symbols that users looked at within the last max_age seconds"""
+    cache = _interest_cache()
+    cutoff = time_module.time() - max_age
+    symbols = [symbol.upper() for symbol in symbols]
+    recent = []
+    for i in range(0, len(symbols), batch_size):
+        keys = [f"{INTEREST_KEY_PREFIX}{symbol}" for symbol in symbols[i:i + batch_size]]
+        seen = cache.get_many(keys)
+        recent.extend(key[len(INTEREST_KEY_PREFIX):] for key, at in seen.items() if at >= cutoff)
+    return recent
@@ -4,9 +4,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from stocks.services.finnhub_service import FinnhubService
-from stocks.models import UserPortfolio, Stock
-from stocks.utils import validate_trading_hours
-from decimal import Decimal
+from stocks.models import UserPortfolio, Stock, PortfolioSnapshot
+from stocks.services.valuation import get_current_prices
+from stocks.services.snapshot_service import SnapshotService
+from stocks.services.analytics import get_portfolio_analytics
+from stocks.services.returns import get_portfolio_returns
+from stocks.utils import validate_trading_hours, mark_symbol_interest
+from datetime import datetime
 
 
 # PUBLIC ENDPOINTS - No authentication required
@@ -105,6 +109,7 @@ def search_stocks(request):
 def get_stock_detail(request, symbol):
     """Get detailed stock information (public endpoint)"""
     service = FinnhubService()
+    mark_symbol_interest(symbol)
     
     # Get real-time quote
     quote_data = service.get_stock_quote(symbol)
@@ -192,20 +197,36 @@ def get_available_sectors(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_portfolio(request):
-    """Get user's portfolio (authenticated endpoint)"""
-    service = FinnhubService()
-    portfolio_items = UserPortfolio.objects.filter(user=request.user)
+    """
+    Get user's portfolio (authenticated endpoint)
+    Query params:
+    - max_staleness: Seconds a locally cached price may be old before it is
+      fetched live (default PORTFOLIO_MAX_STALENESS)
+    """
+    max_staleness = request.GET.get('max_staleness')
+    if max_staleness is not None:
+        try:
+            max_staleness = int(max_staleness)
+            if max_staleness < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'max_staleness must be a non-negative integer (seconds)'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+    
+    portfolio_items = list(UserPortfolio.objects.filter(user=request.user).select_related('stock'))
+    
+    # Local prices; only stale symbols are fetched live, in one batch
+    prices = get_current_prices([item.stock for item in portfolio_items], max_staleness=max_staleness)
     
     portfolio_data = []
     total_invested = 0
     total_current_value = 0
     
     for item in portfolio_items:
-        # Get current price from Finnhub
-        quote_data = service.get_stock_quote(item.stock.symbol)
-        current_price = quote_data.get('current_price', 0) if quote_data else item.stock.current_price
+        price_data = prices[item.stock.symbol]
+        current_price = float(price_data['price'])
         
-        current_value = float(item.quantity * Decimal(str(current_price)))
+        current_value = float(item.quantity * price_data['price'])
         invested_value = float(item.quantity * item.average_price)
         profit_loss = current_value - invested_value
         
@@ -220,8 +241,10 @@ def get_user_portfolio(request):
             'invested_value': invested_value,
             'profit_loss': profit_loss,
             'profit_loss_percentage': (profit_loss / invested_value * 100) if invested_value > 0 else 0,
-            'daily_change': quote_data.get('change', 0) if quote_data else 0,
-            'daily_change_percentage': quote_data.get('percent_change', 0) if quote_data else 0
+            'daily_change': price_data['change'],
+            'daily_change_percentage': price_data['percent_change'],
+            'stale': price_data['stale'],
+            'price_as_of': price_data['as_of']
         })
         
         total_invested += invested_value
@@ -235,4 +258,92 @@ def get_user_portfolio(request):
             'total_profit_loss': total_current_value - total_invested,
             'total_profit_loss_percentage': ((total_current_value - total_invested) / total_invested * 100) if total_invested > 0 else 0
         }
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_portfolio_summary(request):
+    """
+    Get user's portfolio totals from the materialized snapshot (authenticated endpoint).
+    Prices are as of the last refresh; use /portfolio/ for per-holding detail.
+    """
+    try:
+        snapshot = PortfolioSnapshot.objects.get(user=request.user)
+    except PortfolioSnapshot.DoesNotExist:
+        SnapshotService.seed_from_portfolio(request.user.pk)
+        snapshot = PortfolioSnapshot.objects.get(user=request.user)
+    
+    invested = float(snapshot.invested_value)
+    current = float(snapshot.current_value)
+    
+    return Response({
+        'summary': {
+            'total_invested': invested,
+            'total_current_value': current,
+            'total_profit_loss': current - invested,
+            'total_profit_loss_percentage': ((current - invested) / invested * 100) if invested > 0 else 0,
+            'positions': snapshot.positions,
+            'updated_at': snapshot.updated_at
+        }
+    })
+
+
+def _parse_date_range(request):
+    """Read optional date_from/date_to (YYYY-MM-DD) query params; returns (date_from, date_to, error_response)"""
+    try:
+        date_from = request.GET.get('date_from')
+        date_to = request.GET.get('date_to')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+    except ValueError:
+        return None, None, Response({'error': 'Dates must be in YYYY-MM-DD format'}, 
+                                    status=status.HTTP_400_BAD_REQUEST)
+    
+    if date_from and date_to and date_from > date_to:
+        return None, None, Response({'error': 'date_from cannot be after date_to'}, 
+                                    status=status.HTTP_400_BAD_REQUEST)
+    return date_from, date_to, None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_portfolio_analytics_view(request):
+    """
+    Get risk/return analytics for the user's portfolio (authenticated endpoint)
+    Query params:
+    - date_from, date_to: YYYY-MM-DD (default: the last ANALYTICS_DEFAULT_DAYS days)
+    - series: 'true' to include the daily value series
+    """
+    date_from, date_to, error = _parse_date_range(request)
+    if error:
+        return error
+    
+    include_series = request.GET.get('series', 'false').lower() == 'true'
+    
+    try:
+        analytics = get_portfolio_analytics(request.user, date_from, date_to, include_series=include_series)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(analytics)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_portfolio_returns_view(request):
+    """
+    Get time-weighted (TWR) and money-weighted (XIRR) returns (authenticated endpoint)
+    Query params:
+    - date_from, date_to: YYYY-MM-DD (default: the last ANALYTICS_DEFAULT_DAYS days)
+    """
+    date_from, date_to, error = _parse_date_range(request)
+    if error:
+        return error
+    
+    try:
+        returns = get_portfolio_returns(request.user, date_from, date_to)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(returns)
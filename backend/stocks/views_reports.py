@@ -2,14 +2,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils import timezone
 from datetime import datetime
 from decimal import Decimal
 from django.db import transaction
+from django.urls import reverse
 
 from .models import ReportRequest
-from .services.report_service import ReportService
-from .emails.services import ReportEmailService
 
 def _parse_date(s):
     if not s:
@@ -24,7 +22,8 @@ def _parse_date(s):
 @permission_classes([IsAuthenticated])
 def request_report(request):
     """
-    Create and synchronously generate a report, then email a link to the user.
+    Queue a report; run_report_worker generates it and emails a link to the user.
+    Poll /reports/<id>/status/ for progress.
     Body:
     {
       "date_from": "YYYY-MM-DD" | null,
@@ -53,22 +52,13 @@ def request_report(request):
         status="PENDING",
     )
 
-    try:
-        ReportService.generate(rr)
-        # Send notification
-        ReportEmailService.send_report_ready_email(user, rr)
-        return Response({
-            "message": "Report generated and emailed.",
-            "report_id": str(rr.id),
-            "status": rr.status,
-            "file_url": rr.file.url if rr.file else None
-        }, status=status.HTTP_201_CREATED)
-    except Exception as e:
-        rr.status = "FAILED"
-        rr.error_message = str(e)
-        rr.finished_at = timezone.now()
-        rr.save(update_fields=["status", "error_message", "finished_at"])
-        return Response({"error": f"Failed to generate report: {str(e)}"}, status=500)
+    return Response({
+        "message": "Report queued. You will receive an email when it is ready.",
+        "report_id": str(rr.id),
+        "status": rr.status,
+        "file_url": None,
+        "status_url": request.build_absolute_uri(reverse("report-status", args=[rr.id]))
+    }, status=status.HTTP_202_ACCEPTED)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -95,3 +85,25 @@ def report_history(request):
             "error_message": r.error_message,
         })
     return Response({"reports": data, "count": len(data)}, status=200)
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def report_status(request, report_id):
+    """
+    Status of one of the authenticated user's report requests.
+    """
+    try:
+        r = ReportRequest.objects.get(id=report_id, user=request.user)
+    except ReportRequest.DoesNotExist:
+        return Response({"error": "Report not found."}, status=404)
+
+    return Response({
+        "id": str(r.id),
+        "status": r.status,
+        "attempts": r.attempts,
+        "created_at": r.created_at,
+        "started_at": r.started_at,
+        "finished_at": r.finished_at,
+        "file_url": r.file.url if r.file else None,
+        "error_message": r.error_message,
+    }, status=200)
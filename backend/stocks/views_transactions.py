@@ -4,11 +4,21 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from datetime import datetime, timedelta
 from decimal import Decimal
 from .models import Stock, UserPortfolio, Transaction, UserBalance
 from .services.finnhub_service import FinnhubService
+from .services.rate_limiter import PRIORITY_TRADE
+from .services.instrument_service import InstrumentService, InstrumentResolutionError
+from .services.snapshot_service import SnapshotService
+from .services.transaction_export import stream_transactions, FORMAT_CSV, FORMAT_NDJSON
 from .utils import validate_trading_hours
 from .emails.services import TransactionEmailService
+import base64
+import binascii
 import logging
 from django.db import IntegrityError
 
@@ -43,17 +53,13 @@ def buy_stock(request):
             return Response({'error': 'Invalid stock symbol format'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        service = FinnhubService()
+        service = FinnhubService(priority=PRIORITY_TRADE)
         
-        is_valid, validation_message = service.validate_stock_symbol(symbol)
-        if not is_valid:
-            return Response({'error': f'Invalid stock symbol: {validation_message}'}, 
-                           status=status.HTTP_400_BAD_REQUEST)
-        
-        quote_data = service.get_stock_quote(symbol)
-        if not quote_data:
-            return Response({'error': 'Could not get valid stock price'}, 
-                           status=status.HTTP_400_BAD_REQUEST)
+        # One quote (plus a profile for symbols we have never seen)
+        try:
+            stock, quote_data = InstrumentService(service).resolve(symbol)
+        except InstrumentResolutionError as e:
+            return Response({'error': e.message}, status=e.status_code)
         
         current_price = Decimal(str(quote_data['current_price']))
         total_cost = current_price * quantity
@@ -73,28 +79,9 @@ def buy_stock(request):
         
         with transaction.atomic():
 
-            stock, created = Stock.objects.get_or_create(
-                symbol=symbol,
-                defaults={
-                    'name': f"{symbol} Corporation",
-                    'current_price': current_price,
-                    'currency': 'USD',
-                    'exchange': 'NASDAQ'
-                }
-            )
-
-            if created:
-                profile_data = service.get_stock_profile(symbol)
-                if profile_data:
-                    stock.name = profile_data.get('name', f"{symbol} Corporation")
-                    stock.exchange = profile_data.get('exchange', 'NASDAQ')
-                    stock.currency = profile_data.get('currency', 'USD')
-                    stock.sector = profile_data.get('finnhubIndustry', '')
-                    stock.market_cap = profile_data.get('marketCapitalization')
-                    stock.save()
-
+            # Other holders' snapshots follow via the refresh daemon's revalue_stale()
             stock.current_price = current_price
-            stock.save()
+            stock.save(update_fields=['current_price', 'last_updated'])
 
             try:
                 portfolio_item = UserPortfolio.objects.select_for_update().get(user=request.user, stock=stock)
@@ -123,6 +110,7 @@ def buy_stock(request):
                         }
                     )
 
+            SnapshotService.apply_holding(portfolio_item)
 
             user_balance.balance -= total_cost
             user_balance.save()
@@ -180,23 +168,9 @@ def sell_stock(request):
         #        'market_open': False
         #    }, status=status.HTTP_400_BAD_REQUEST)
 
-        service = FinnhubService()
-        
-        is_valid, validation_message = service.validate_stock_symbol(symbol)
-        if not is_valid:
-            return Response({'error': f'Invalid stock symbol: {validation_message}'}, 
-                           status=status.HTTP_400_BAD_REQUEST)
-        
-        quote_data = service.get_stock_quote(symbol)
-        if not quote_data:
-            return Response({'error': 'Could not get valid stock price'}, 
-                           status=status.HTTP_400_BAD_REQUEST)
-        
-        current_price = Decimal(str(quote_data['current_price']))
-        total_revenue = current_price * quantity
-        
+        # Check the holding first so invalid orders cost no upstream call
         try:
-            portfolio_item = UserPortfolio.objects.get(user=request.user, stock__symbol=symbol)
+            portfolio_item = UserPortfolio.objects.select_related('stock').get(user=request.user, stock__symbol=symbol)
             if portfolio_item.quantity < quantity:
                 return Response({'error': 'Insufficient shares'}, 
                                status=status.HTTP_400_BAD_REQUEST)
@@ -204,6 +178,17 @@ def sell_stock(request):
             return Response({'error': 'You do not own this stock'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
+        service = FinnhubService(priority=PRIORITY_TRADE)
+        
+        # The held stock is already loaded (even if since delisted): one quote only
+        try:
+            _, quote_data = InstrumentService(service).resolve(symbol, stock=portfolio_item.stock)
+        except InstrumentResolutionError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        
+        current_price = Decimal(str(quote_data['current_price']))
+        total_revenue = current_price * quantity
+        
         with transaction.atomic():
             portfolio_item.quantity -= quantity
             if portfolio_item.quantity == 0:
@@ -211,6 +196,8 @@ def sell_stock(request):
                 portfolio_item.save()
             else:
                 portfolio_item.save()
+
+            SnapshotService.apply_holding(portfolio_item)
             
             user_balance = UserBalance.objects.get(user=request.user)
             user_balance.balance += total_revenue
@@ -350,14 +337,100 @@ def withdraw_money(request):
         return Response({'error': str(e)}, 
                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 500
+
+
+def _encode_cursor(tx):
+    raw = f"{tx.created_at.isoformat()}|{tx.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Return (created_at, id) from a history cursor; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, tx_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (TypeError, UnicodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_transaction_history(request):
-    """Get user's transaction history - Uses Auth0 authentication"""
-    transactions = Transaction.objects.filter(user=request.user).select_related('stock')
+    """
+    Get user's transaction history, newest first - Uses Auth0 authentication
+    Query params:
+    - limit: page size (default 100, max 500)
+    - cursor: next_cursor from the previous page
+    - type: BUY, SELL, DEPOSIT, WITHDRAWAL or REFERRAL
+    - symbol: stock symbol
+    - date_from, date_to: YYYY-MM-DD (inclusive)
+    """
+    params = request.GET
+    try:
+        limit = int(params.get('limit', HISTORY_DEFAULT_LIMIT))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'limit must be a positive integer'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    limit = min(limit, HISTORY_MAX_LIMIT)
+    
+    transactions = (
+        Transaction.objects.filter(user=request.user)
+        .select_related('stock')
+        .only(
+            'id', 'transaction_type', 'quantity', 'price', 'amount', 'transaction_fee',
+            'transfer_reference', 'ip_address', 'created_at', 'stock__symbol', 'stock__name'
+        )
+        .order_by('-created_at', '-id')
+    )
+    
+    tx_type = params.get('type')
+    if tx_type:
+        tx_type = tx_type.upper()
+        if tx_type not in dict(Transaction.TRANSACTION_TYPES):
+            return Response({'error': f'Invalid type {tx_type}'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        transactions = transactions.filter(transaction_type=tx_type)
+    
+    symbol = params.get('symbol')
+    if symbol:
+        transactions = transactions.filter(stock__symbol=symbol.upper())
+    
+    try:
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        if date_from:
+            start = datetime.strptime(date_from, '%Y-%m-%d')
+            transactions = transactions.filter(created_at__gte=timezone.make_aware(start))
+        if date_to:
+            end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+            transactions = transactions.filter(created_at__lt=timezone.make_aware(end))
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    cursor = params.get('cursor')
+    if cursor:
+        try:
+            created_at, tx_id = _decode_cursor(cursor)
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        transactions = transactions.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=tx_id)
+        )
+    
+    # One extra row tells whether there is a next page
+    page = list(transactions[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
     
     transaction_data = []
-    for tx in transactions:
+    for tx in page:
         transaction_data.append({
             'id': tx.id,
             'type': tx.transaction_type,
@@ -372,7 +445,67 @@ def get_transaction_history(request):
             'timestamp': tx.created_at
         })
     
-    return Response({'transactions': transaction_data})
+    return Response({
+        'transactions': transaction_data,
+        'next_cursor': _encode_cursor(page[-1]) if has_more else None,
+        'limit': limit
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request):
+    """
+    Stream the user's transactions as a file - Uses Auth0 authentication
+    Query params:
+    - fmt: csv (default) or ndjson
+    - gzip: 'true' to gzip the stream
+    - type, date_from, date_to: same filters as the history endpoint
+    - all: 'true' to export every user's transactions (admins only)
+    """
+    params = request.GET
+    fmt = params.get('fmt', FORMAT_CSV).lower()
+    if fmt not in (FORMAT_CSV, FORMAT_NDJSON):
+        return Response({'error': "fmt must be 'csv' or 'ndjson'"}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    compress = params.get('gzip', 'false').lower() == 'true'
+    
+    transactions = Transaction.objects.all()
+    if params.get('all', 'false').lower() == 'true':
+        if getattr(request.user, 'type', '') != 'admin':
+            return Response({'error': 'Admin only'}, 
+                           status=status.HTTP_403_FORBIDDEN)
+    else:
+        transactions = transactions.filter(user=request.user)
+    
+    tx_type = params.get('type')
+    if tx_type:
+        transactions = transactions.filter(transaction_type=tx_type.upper())
+    
+    try:
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        if date_from:
+            start = datetime.strptime(date_from, '%Y-%m-%d')
+            transactions = transactions.filter(created_at__gte=timezone.make_aware(start))
+        if date_to:
+            end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+            transactions = transactions.filter(created_at__lt=timezone.make_aware(end))
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    filename = f"transactions_{timezone.now():%Y%m%d_%H%M%S}.{fmt}"
+    content_type = 'text/csv' if fmt == FORMAT_CSV else 'application/x-ndjson'
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    
+    response = StreamingHttpResponse(
+        stream_transactions(transactions, fmt=fmt, gzip=compress),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
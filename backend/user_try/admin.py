@@ -2,6 +2,7 @@
 from django.contrib import admin
 from .models import User, UserSession, AuditLog
 from user_try.emails.services import UserEmailService
+from .user_cache import invalidate_users
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -46,16 +47,19 @@ class UserAdmin(admin.ModelAdmin):
     
     def make_admin(self, request, queryset):
         updated = queryset.update(type='admin')
+        invalidate_users(queryset)
         self.message_user(request, f'{updated} users changed to admin.')
     make_admin.short_description = "Make admin"
     
     def make_vip(self, request, queryset):
         updated = queryset.update(type='vip')
+        invalidate_users(queryset)
         self.message_user(request, f'{updated} users changed to VIP.')
     make_vip.short_description = "Make VIP"
     
     def make_standard(self, request, queryset):
         updated = queryset.update(type='standard')
+        invalidate_users(queryset)
         self.message_user(request, f'{updated} users changed to Standard.')
     make_standard.short_description = "Make Standard"
 
@@ -5,4 +5,5 @@ class UserTryConfig(AppConfig):
     name = 'user_try'
 
     def ready(self):
+        import user_try.checks
         import user_try.signals
@@ -1,12 +1,45 @@
-import json
+import hashlib
+import logging
+import threading
+import time
+
+import jwt
 import requests
 from django.conf import settings
-from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from .models import User
-from django.core.exceptions import ObjectDoesNotExist
+from .user_cache import get_user_by_auth0_id
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait on Auth0 (JWKS and /userinfo)
+HTTP_TIMEOUT = 10
+
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+def get_jwks_client():
+    """
+    Process-wide PyJWKClient for the tenant's signing keys. Keys are cached
+    for AUTH0_JWKS_LIFESPAN seconds, and a token signed with a kid that is
+    not in the cached set triggers one refetch (key rotation).
+    """
+    global _jwks_client
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                _jwks_client = jwt.PyJWKClient(
+                    f"https://{settings.AUTH0_CONFIG['DOMAIN']}/.well-known/jwks.json",
+                    cache_keys=True,
+                    lifespan=settings.AUTH0_JWKS_LIFESPAN,
+                    timeout=HTTP_TIMEOUT,
+                )
+    return _jwks_client
+
+
 class Auth0Service:
     def __init__(self):
         auth0 = settings.AUTH0_CONFIG
@@ -14,9 +47,8 @@ class Auth0Service:
         self.client_id = auth0["CLIENT_ID"]
         self.client_secret = auth0["CLIENT_SECRET"]
         self.audience = auth0["API_AUDIENCE"]
+        self.algorithms = auth0["ALGORITHMS"]
 
-        self.userinfo_cache = {}
-        
     def exchange_code_for_tokens(self, code, redirect_uri):
         token_url = f"https://{self.domain}/oauth/token"
         payload = {
@@ -31,38 +63,45 @@ class Auth0Service:
         return response.json()
 
     def decode_auth0_token(self, token):
-        # ✅ No hacemos validación de firma en dev, solo decodificamos el payload
-        parts = token.split('.')
-        if len(parts) != 3:
-            return {}
-        import base64
-        padded = parts[1] + '=' * (-len(parts[1]) % 4)
-        return json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+        """
+        Verify signature, expiry, audience and issuer of an Auth0 access
+        token and return its claims. Raises jwt.InvalidTokenError, or
+        jwt.PyJWKClientError when no matching signing key can be loaded.
+        """
+        signing_key = get_jwks_client().get_signing_key_from_jwt(token)
+        return jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer=f"https://{self.domain}/",
+            options={"require": ["exp", "sub"]},
+        )
 
     def get_user_info_from_auth0(self, token):
-        if token in self.userinfo_cache:
-            return self.userinfo_cache[token]
-
         try:
             headers = {"Authorization": f"Bearer {token}"}
-            resp = requests.get(f"https://{self.domain}/userinfo", headers=headers)
+            resp = requests.get(f"https://{self.domain}/userinfo", headers=headers, timeout=HTTP_TIMEOUT)
             if resp.status_code == 200:
-                data = resp.json()
-                self.userinfo_cache[token] = data
-                return data
+                return resp.json()
         except Exception:
             pass
 
         return {}
 
-    def get_or_create_user_from_auth0(self, token):
-        payload = self.decode_auth0_token(token)
+    def get_or_create_user_from_auth0(self, token, payload=None):
+        payload = payload or self.decode_auth0_token(token)
+        auth0_id = payload["sub"]
+
+        try:
+            return get_user_by_auth0_id(auth0_id)
+        except User.DoesNotExist:
+            pass
 
-        auth0_id = payload.get("sub")
         email = payload.get("email")
         name = payload.get("name", "")
 
-        # ✅ Si no viene email, un Fallback a /userinfo solo una vez
+        # ✅ Si no viene email, un Fallback a /userinfo (solo al crear el usuario)
         if not email:
             userinfo = self.get_user_info_from_auth0(token)
             email = userinfo.get("email", None)
@@ -72,32 +111,62 @@ class Auth0Service:
         if not email:
             email = f"{auth0_id.replace('|', '_')}@auth0-temp.local"
 
-        try:
-            user = User.objects.get(auth0_id=auth0_id)
-        except ObjectDoesNotExist:
-            user = User.objects.create(
-                auth0_id=auth0_id,
-                username=email.split("@")[0],
-                email=email,
-                type="standard",
-                status="active",
-            )
-
-        return user
+        return User.objects.create(
+            auth0_id=auth0_id,
+            username=email.split("@")[0],
+            email=email,
+            type="standard",
+            status="active",
+        )
 
 
 class Auth0Authentication(BaseAuthentication):
-    def authenticate(self, request):
-        token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    """
+    Bearer-token authentication against Auth0.
+
+    A token is verified once; its subject is then cached under the token's
+    SHA-256 until the token expires (at most AUTH0_TOKEN_CACHE_TTL), and the
+    user comes from the user cache, so repeat requests make no outbound
+    calls and do not query the user table (with the default database-backed
+    shared cache, the cache lookup itself is one query).
+    """
 
+    def _token_key(self, token):
+        return "auth0:token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def authenticate(self, request):
+        auth_header = request.headers.get("Authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return None
+        token = auth_header[len("Bearer "):].strip()
         if not token:
             return None
 
-        from .auth import Auth0Service
-        service = Auth0Service()
-        user = service.get_or_create_user_from_auth0(token)
+        cache = caches[settings.AUTH0_TOKEN_CACHE_ALIAS]
+        key = self._token_key(token)
+        auth0_id = cache.get(key)
+        if auth0_id is not None:
+            try:
+                return (get_user_by_auth0_id(auth0_id), None)
+            except User.DoesNotExist:
+                pass
 
-        if not user:
+        service = Auth0Service()
+        try:
+            payload = service.decode_auth0_token(token)
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed("Token has expired")
+        except jwt.PyJWKClientConnectionError as e:
+            logger.error(f"Could not load Auth0 signing keys: {e}")
+            raise exceptions.AuthenticationFailed("Unable to verify token")
+        except (jwt.PyJWKClientError, jwt.InvalidTokenError):
+            # PyJWKClientError here: no key with the token's kid, even after a refetch
             raise exceptions.AuthenticationFailed("Invalid Auth0 token")
 
+        user = service.get_or_create_user_from_auth0(token, payload)
+
+        ttl = min(settings.AUTH0_TOKEN_CACHE_TTL, int(payload["exp"] - time.time()))
+        if ttl > 0:
+            cache.set(key, payload["sub"], ttl)
+
         return (user, None)
@@ -22,14 +22,16 @@ class JWTAuthentication(BaseAuthentication):
             # Verify JWT token
             payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
             
-            # Check if session exists and is active
-            session = UserSession.objects.get(
-                token=token, 
+            # Check if session exists and is active (session and user in one query)
+            session = UserSession.objects.select_related('user').get(
+                token_hash=UserSession.hash_token(token),
                 is_active=True,
                 expires_at__gt=timezone.now()
             )
             
-            user = User.objects.get(id=payload['user_id'], status='active')
+            user = session.user
+            if user.id != payload['user_id'] or user.status != 'active':
+                raise User.DoesNotExist
             
             return (user, token)
             
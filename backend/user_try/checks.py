@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+DATABASE_BACKEND = 'django.core.cache.backends.db.DatabaseCache'
+
+
+@register()
+def check_user_cache_is_shared(app_configs, **kwargs):
+    """Invalidations written by one worker must be seen by all of them"""
+    backend = settings.CACHES.get(settings.USER_CACHE_ALIAS, {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS and not settings.DEBUG:
+        return [Error(
+            f"USER_CACHE_ALIAS '{settings.USER_CACHE_ALIAS}' uses {backend}, which is per process",
+            hint="Point it at a shared backend (database or Redis cache), e.g. the 'shared' alias.",
+            id='user_try.E001',
+        )]
+    return []
+
+
+@register()
+def check_shared_cache_is_not_database(app_configs, **kwargs):
+    """The database cache works, but costs queries on every request it serves"""
+    backend = settings.CACHES.get(settings.SHARED_CACHE_ALIAS, {}).get('BACKEND')
+    if backend == DATABASE_BACKEND and not settings.DEBUG:
+        return [Warning(
+            f"The '{settings.SHARED_CACHE_ALIAS}' cache uses the database: every lookup is a query "
+            f"and every write counts (and may cull) the cache table",
+            hint="Set SHARED_CACHE_BACKEND/SHARED_CACHE_LOCATION to Redis or Memcached in production.",
+            id='user_try.W001',
+        )]
+    return []
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from user_try.models import UserSession
+
+class Command(BaseCommand):
+    help = 'Deactivate expired user sessions and delete old inactive ones in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=30,
+            help='Keep expired or deactivated sessions this many days before deleting them'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows updated or deleted per statement'
+        )
+
+    def _in_batches(self, qs, batch_size, apply):
+        # Small id batches keep each statement's locks short on a busy table
+        done = 0
+        while True:
+            ids = list(qs.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return done
+            done += apply(UserSession.objects.filter(pk__in=ids))
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['retention_days'])
+        batch_size = options['batch_size']
+
+        expired = self._in_batches(
+            UserSession.objects.filter(is_active=True, expires_at__lte=now),
+            batch_size,
+            lambda batch: batch.update(is_active=False),
+        )
+        purged = self._in_batches(
+            UserSession.objects.filter(Q(expires_at__lt=cutoff) | Q(is_active=False, created_at__lt=cutoff)),
+            batch_size,
+            lambda batch: batch.delete()[0],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} sessions, deleted {purged}"))
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_token_hash(apps, schema_editor):
+    UserSession = apps.get_model('user_try', 'UserSession')
+    seen = set()
+    duplicates = []
+    # Newest first, so the most recent session keeps a reused token
+    for pk, token in UserSession.objects.order_by('-created_at', '-pk').values_list('pk', 'token').iterator(chunk_size=2000):
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        if token_hash in seen:
+            duplicates.append(pk)
+            continue
+        seen.add(token_hash)
+        UserSession.objects.filter(pk=pk).update(token_hash=token_hash)
+    for i in range(0, len(duplicates), 1000):
+        UserSession.objects.filter(pk__in=duplicates[i:i + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_try', '0010_user_email_pending_sent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersession',
+            name='token_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_token_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='usersession',
+            name='token_hash',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['expires_at'], name='user_session_expires_idx'),
+        ),
+    ]
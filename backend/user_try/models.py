@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth.hashers import check_password, make_password
 from django.utils import timezone
+import hashlib
 import secrets
 import string
 
@@ -74,15 +75,33 @@ class User(models.Model):
 class UserSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     token = models.TextField()
+    # SHA-256 of token: sessions are looked up by this indexed column
+    token_hash = models.CharField(max_length=64, unique=True, editable=False)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
     expires_at = models.DateTimeField()
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='user_session_expires_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.created_at}"
 
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.token_hash = self.hash_token(self.token)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'token' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'token_hash'}
+        super().save(*args, **kwargs)
+
 
 class AuditLog(models.Model):
     ACTION_TYPES = [
@@ -1,17 +1,21 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from .models import User
+from .user_cache import invalidate_user
 from user_try.emails.services import UserEmailService
 
 @receiver(pre_save, sender=User)
 def track_previous_status(sender, instance, **kwargs):
     if instance.pk:
         try:
-            instance._old_status = sender.objects.get(pk=instance.pk).status
+            instance._old_status, instance._old_auth0_id = sender.objects.values_list(
+                'status', 'auth0_id'
+            ).get(pk=instance.pk)
         except sender.DoesNotExist:
-            instance._old_status = None
+            instance._old_status = instance._old_auth0_id = None
     else:
-        instance._old_status = None
+        instance._old_status = instance._old_auth0_id = None
 
 
 @receiver(post_save, sender=User)
@@ -35,3 +39,20 @@ def handle_status_change(sender, instance, created, **kwargs):
     # Suspended -> Active (reactivation)
     elif prev == "suspended" and new == "active":
         UserEmailService.send_account_reactivated_email(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Status, type, etc. changes must reach the next authenticated request.
+    # Connected after handle_status_change, so its update() is covered too.
+    auth0_ids = {instance.auth0_id, getattr(instance, '_old_auth0_id', None)}
+
+    def invalidate():
+        for auth0_id in auth0_ids:
+            invalidate_user(auth0_id)
+
+    invalidate()
+    # Again after commit: a request between now and the commit could cache
+    # the old row under the new version
+    transaction.on_commit(invalidate)
@@ -37,4 +37,7 @@ urlpatterns = [
     path("admin/audit-logs/", adminv.admin_audit_list),
     path("admin/sessions/", adminv.admin_sessions_list),
     path("admin/sessions/<int:session_id>/deactivate/", adminv.admin_sessions_deactivate),
+    path("admin/finnhub/stats/", adminv.admin_finnhub_stats),
+    path("admin/portfolio-snapshots/", adminv.admin_portfolio_snapshots),
+    path("admin/ledger/summary/", adminv.admin_ledger_summary),
 ]
\ No newline at end of file
@@ -0,0 +1,71 @@
+# user_try/user_cache.py
+"""
+Cache of User rows keyed by auth0_id, for request authentication.
+
+Entries are field dicts tagged with the user's cache version; every User
+save or delete (see user_try.signals) and every bulk update of users (see
+invalidate_users) sets a new version, so a status or role change is seen
+on the next request. Versions are timestamps, never reused: if the version
+key is evicted, the replacement cannot match an old entry.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import User
+
+
+def _cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def _version_key(auth0_id):
+    return f"user:version:{auth0_id}"
+
+
+def _entry_key(auth0_id):
+    return f"user:{auth0_id}"
+
+
+def _fields():
+    return [f.attname for f in User._meta.concrete_fields]
+
+
+def invalidate_user(auth0_id):
+    """Make the cached row for the auth0_id stale by moving to a new version"""
+    if not auth0_id:
+        return
+    _cache().set(_version_key(auth0_id), time.time_ns(), None)
+
+
+def invalidate_users(queryset):
+    """invalidate_user() for every user in the queryset, for update() calls that skip signals"""
+    for auth0_id in queryset.exclude(auth0_id__isnull=True).values_list('auth0_id', flat=True):
+        invalidate_user(auth0_id)
+
+
+def get_user_by_auth0_id(auth0_id):
+    """
+    The User with this auth0_id, from the cache when its entry is current,
+    otherwise from the database. Raises User.DoesNotExist.
+    """
+    cache = _cache()
+    version_key, entry_key = _version_key(auth0_id), _entry_key(auth0_id)
+    # Version and entry in one round trip
+    found = cache.get_many([version_key, entry_key])
+    version = found.get(version_key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key)
+
+    fields = _fields()
+    entry = found.get(entry_key)
+    if entry is not None and entry['version'] == version:
+        return User.from_db(User.objects.db, fields, [entry['row'][f] for f in fields])
+
+    user = User.objects.get(auth0_id=auth0_id)
+    row = {f: getattr(user, f) for f in fields}
+    cache.set(entry_key, {'version': version, 'row': row}, settings.USER_CACHE_TTL)
+    return user
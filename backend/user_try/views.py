@@ -5,7 +5,6 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.utils import timezone
 from django.db import transaction
-from django.db import models
 
 from .serializers import UserSerializer, AuditLogSerializer, UseReferralCodeSerializer
 from .models import User, AuditLog
@@ -275,13 +274,8 @@ def get_referral_stats(request):
     )
     
     # Calculate total earnings from referrals
-    from stocks.models import Transaction
-    referral_earnings = Transaction.objects.filter(
-        user=user,
-        transaction_type='REFERRAL'
-    ).aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
+    from stocks.services.ledger_rollup import summarize
+    referral_earnings = summarize(user, types=['REFERRAL']).get('REFERRAL', {}).get('amount', 0)
     
     return Response({
         'referral_code': user.referral_code,
@@ -10,7 +10,7 @@ import json
 from user_try.models import User, UserSession, AuditLog
 from stocks.models import (
     Transaction, Stock, ReportRequest, ReferralBonus, UserBalance,
-    UserPortfolio, StockPriceHistory
+    UserPortfolio, StockPriceHistory, PortfolioSnapshot
 )
 
 # ---------- Admin guard ----------
@@ -332,3 +332,76 @@ def admin_sessions_deactivate(request, session_id: int):
     s.is_active = False
     s.save(update_fields=["is_active"])
     return JsonResponse({"ok": True})
+
+# ---------- FINNHUB ----------
+@csrf_exempt
+@require_http_methods(["GET"])
+def admin_finnhub_stats(request):
+    if not _require_admin(request): return _forbidden()
+    from stocks.services.quote_cache import get_quote_cache
+    from stocks.services.finnhub_service import get_session_stats
+    from stocks.services.rate_limiter import get_rate_limiter
+    from stocks.services.circuit_breaker import get_circuit_breaker
+    return JsonResponse({
+        "quote_cache": get_quote_cache().stats(),
+        "http_session": get_session_stats(),
+        "rate_limiter": get_rate_limiter().stats(),
+        "circuit_breaker": get_circuit_breaker().stats(),
+    })
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def admin_portfolio_snapshots(request):
+    if not _require_admin(request): return _forbidden()
+    q_user = request.GET.get("user")
+    qs = PortfolioSnapshot.objects.select_related("user").order_by("-current_value")
+    if q_user:
+        qs = qs.filter(Q(user__username__icontains=q_user) | Q(user__email__icontains=q_user))
+    page_obj, paginator = _paginate(request, qs, 30)
+    data = [{
+        "user": s.user.username,
+        "user_id": s.user_id,
+        "invested_value": float(s.invested_value),
+        "current_value": float(s.current_value),
+        "profit_loss": float(s.profit_loss),
+        "positions": s.positions,
+        "updated_at": s.updated_at.isoformat(),
+    } for s in page_obj.object_list]
+    return JsonResponse({"results": data, "page": page_obj.number, "pages": paginator.num_pages, "total": paginator.count})
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def admin_ledger_summary(request):
+    if not _require_admin(request): return _forbidden()
+    from datetime import date, datetime, time, timezone as dt_timezone
+    from stocks.services.ledger_rollup import summarize
+    try:
+        d_from = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else None
+        d_to = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else None
+    except ValueError:
+        return HttpResponseBadRequest(JsonResponse({"detail": "Dates must be YYYY-MM-DD"}))
+    start = datetime.combine(d_from, time.min, tzinfo=dt_timezone.utc) if d_from else None
+    end = datetime.combine(d_to, time.max, tzinfo=dt_timezone.utc) if d_to else None
+
+    user = None
+    if request.GET.get("user_id"):
+        user_id = request.GET["user_id"]
+        user = User.objects.filter(id=user_id).first() if user_id.isdigit() else None
+        if user is None:
+            return HttpResponseBadRequest(JsonResponse({"detail": "User not found"}))
+
+    totals = summarize(user, start, end)
+    data = {
+        tx_type: {
+            "amount": float(t["amount"]),
+            "magnitude": float(t["magnitude"]),
+            "fees": float(t["fee"]),
+            "count": t["count"],
+        } for tx_type, t in totals.items()
+    }
+    return JsonResponse({
+        "from": d_from.isoformat() if d_from else None,
+        "to": d_to.isoformat() if d_to else None,
+        "user_id": user.id if user else None,
+        "by_type": data,
+    })
@@ -26,20 +26,39 @@ function Content_transferencias() {
   const { token, isLoadingProfile } = useUser();
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [currentPage, setCurrentPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const rowsPerPage = 8;
+  // History is served in pages; more are loaded as the user pages forward
+  const pageSize = 100;
 
-  const fetchTransactions = () => {
-    if (!token) return;
-    axios
+  const fetchTransactions = (cursor?: string) => {
+    if (!token) return Promise.resolve();
+    return axios
       .get(`${API_URL}/stocks/transactions/history/`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: { limit: pageSize, cursor },
       })
       .then((res) => {
-        setTransactions(res.data.transactions);
+        if (cursor) {
+          setTransactions((prev) => [...prev, ...res.data.transactions]);
+        } else {
+          setTransactions(res.data.transactions);
+          setCurrentPage(1);
+        }
+        setNextCursor(res.data.next_cursor);
       })
       .catch(() => {});
   };
 
+  const goToNextPage = () => {
+    const needed = (currentPage + 1) * rowsPerPage;
+    if (needed > transactions.length && nextCursor) {
+      fetchTransactions(nextCursor).then(() => setCurrentPage((prev) => prev + 1));
+    } else {
+      setCurrentPage((prev) => prev + 1);
+    }
+  };
+
   useEffect(() => {
     fetchTransactions();
   }, [token]);
@@ -145,7 +164,7 @@ function Content_transferencias() {
             </tbody>
           </table>
 
-          {transactions.length > rowsPerPage && (
+          {(transactions.length > rowsPerPage || nextCursor) && (
             <div className="pagination-controls">
               <button
                 disabled={currentPage === 1}
@@ -157,8 +176,8 @@ function Content_transferencias() {
               <span>Page {currentPage}</span>
 
               <button
-                disabled={currentPage * rowsPerPage >= transactions.length}
-                onClick={() => setCurrentPage((prev) => prev + 1)}
+                disabled={currentPage * rowsPerPage >= transactions.length && !nextCursor}
+                onClick={goToNextPage}
               >
                 Next
               </button>
@@ -22,6 +22,7 @@ function RecentTransfers({ refreshKey }: { refreshKey: number }) {
     if (!token) return;
     const res = await axios.get(`${API_URL}/stocks/transactions/history/`, {
       headers: { Authorization: `Bearer ${token}` },
+      params: { limit: 3 },
     });
     setTransactions(res.data.transactions);
   };
@@ -9,6 +9,7 @@ export default function ContentHome() {
   } = useReferralCode();
   
   const { 
+    report,
     requestReport, 
     isRequesting, 
     error, 
@@ -67,6 +68,14 @@ export default function ContentHome() {
           {successMessage && (
             <div className="success-message">
               {successMessage}
+              {report?.file_url && (
+                <>
+                  {' '}
+                  <a href={report.file_url} target="_blank" rel="noopener noreferrer">
+                    Download
+                  </a>
+                </>
+              )}
             </div>
           )}
         </section>
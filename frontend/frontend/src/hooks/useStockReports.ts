@@ -1,8 +1,12 @@
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import { useUser } from "../components/UserContext";
 import axios from "axios";
 
 const API_URL = "http://back.g4.atenea.lat/api/stocks/reports/request/";
+// The report is generated by a worker: poll its status until it finishes
+const POLL_INTERVAL_MS = 3000;
+const POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
 interface StockReportRequest {
   date_from?: string | null;
   date_to?: string | null;
@@ -15,6 +19,14 @@ interface StockReportResponse {
   report_id: string;
   status: string;
   file_url: string | null;
+  status_url: string;
+}
+
+interface StockReportStatus {
+  id: string;
+  status: "PENDING" | "GENERATING" | "COMPLETED" | "FAILED";
+  file_url: string | null;
+  error_message: string | null;
 }
 
 interface UseStockReportsReturn {
@@ -32,6 +44,28 @@ export const useStockReports = (): UseStockReportsReturn => {
   const [isRequesting, setIsRequesting] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [successMessage, setSuccessMessage] = useState<string | null>(null);
+  const mounted = useRef(true);
+
+  useEffect(() => {
+    mounted.current = true;
+    return () => {
+      mounted.current = false;
+    };
+  }, []);
+
+  const waitForReport = useCallback(async (statusUrl: string): Promise<StockReportStatus> => {
+    const deadline = Date.now() + POLL_TIMEOUT_MS;
+    while (mounted.current && Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+      const response = await axios.get<StockReportStatus>(statusUrl, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (response.data.status === "COMPLETED" || response.data.status === "FAILED") {
+        return response.data;
+      }
+    }
+    throw new Error("El reporte sigue en proceso. Recibirás un correo cuando esté listo.");
+  }, [token]);
 
   const requestReport = useCallback(async (requestData: StockReportRequest): Promise<StockReportResponse | null> => {
     setIsRequesting(true);
@@ -51,9 +85,26 @@ export const useStockReports = (): UseStockReportsReturn => {
         }
       });
 
-      const reportResponse: StockReportResponse = response.data;
-      setReport(reportResponse);
-      setSuccessMessage(reportResponse.message);
+      const queued: StockReportResponse = response.data;
+      setReport(queued);
+      setSuccessMessage(queued.message);
+
+      const finished = await waitForReport(queued.status_url);
+      if (finished.status === "FAILED") {
+        throw new Error(finished.error_message || "No se pudo generar el reporte");
+      }
+
+      const reportResponse: StockReportResponse = {
+        ...queued,
+        status: finished.status,
+        // file_url is relative to the API host
+        file_url: finished.file_url ? new URL(finished.file_url, queued.status_url).toString() : null,
+        message: "Reporte listo"
+      };
+      if (mounted.current) {
+        setReport(reportResponse);
+        setSuccessMessage(reportResponse.message);
+      }
       
       alert(` ${reportResponse.message}`);
       
@@ -72,6 +123,7 @@ export const useStockReports = (): UseStockReportsReturn => {
         errorMessage = error.message;
       }
 
+      setSuccessMessage(null);
       setError(errorMessage);
       
       alert(`${errorMessage}`);
@@ -81,7 +133,7 @@ export const useStockReports = (): UseStockReportsReturn => {
     } finally {
       setIsRequesting(false);
     }
-  }, [token]);
+  }, [token, waitForReport]);
 
   return {
     report,